@@ -1,26 +1,74 @@
-from fastapi import Depends
-from ..core.config import settings
+from fastapi import Depends, Request
 from ..core.message_queue import AsyncMessageQueue
+from ..infrastructure.admission_controller import AdmissionController
+from ..infrastructure.blob_store import BlobStore
+from ..infrastructure.client_registry import ClientRegistry
 from ..infrastructure.torchserve_client import TorchServeClient
+from ..infrastructure.prediction_cache import PredictionCache
 from ..infrastructure.redis_client import RedisClient
+from ..infrastructure.result_notifier import ResultNotifier
 from ..domain.prediction_service import PredictionService
 
 
-def get_message_queue() -> AsyncMessageQueue:
-    return AsyncMessageQueue()
+def get_clients(request: Request) -> ClientRegistry:
+    return request.app.state.clients
 
 
-def get_redis_client() -> RedisClient:
-    return RedisClient(settings.REDIS_HOST, settings.REDIS_PORT)
+def get_message_queue(
+    clients: ClientRegistry = Depends(get_clients),
+) -> AsyncMessageQueue:
+    return clients.mq
 
 
-def get_torchserve_client() -> TorchServeClient:
-    return TorchServeClient(settings.TORCHSERVE_HOST)
+def get_redis_client(clients: ClientRegistry = Depends(get_clients)) -> RedisClient:
+    return clients.redis_client
+
+
+def get_torchserve_client(
+    clients: ClientRegistry = Depends(get_clients),
+) -> TorchServeClient:
+    return clients.torchserve_client
+
+
+def get_result_notifier(
+    clients: ClientRegistry = Depends(get_clients),
+) -> ResultNotifier:
+    return clients.result_notifier
+
+
+def get_prediction_cache(
+    clients: ClientRegistry = Depends(get_clients),
+) -> PredictionCache:
+    return clients.prediction_cache
+
+
+def get_blob_store(clients: ClientRegistry = Depends(get_clients)) -> BlobStore:
+    return clients.blob_store
+
+
+def get_admission_controller(
+    clients: ClientRegistry = Depends(get_clients),
+) -> AdmissionController | None:
+    return clients.admission_controller
 
 
 def get_prediction_service(
     mq: AsyncMessageQueue = Depends(get_message_queue),
     torchserve_client: TorchServeClient = Depends(get_torchserve_client),
     redis_client: RedisClient = Depends(get_redis_client),
+    result_notifier: ResultNotifier = Depends(get_result_notifier),
+    prediction_cache: PredictionCache = Depends(get_prediction_cache),
+    blob_store: BlobStore = Depends(get_blob_store),
+    admission_controller: AdmissionController | None = Depends(
+        get_admission_controller
+    ),
 ) -> PredictionService:
-    return PredictionService(mq, torchserve_client, redis_client)
+    return PredictionService(
+        mq,
+        torchserve_client,
+        redis_client,
+        result_notifier,
+        prediction_cache,
+        blob_store,
+        admission_controller,
+    )
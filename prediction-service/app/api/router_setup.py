@@ -1,5 +1,9 @@
 from fastapi import APIRouter
+from .routes.metrics import metrics
+from .routes.monitoring import monitoring
 from .routes.predictions import predictions
 
 router = APIRouter()
 router.include_router(predictions, prefix="/predictions", tags=["predictions"])
+router.include_router(monitoring, prefix="/monitoring", tags=["monitoring"])
+router.include_router(metrics, tags=["monitoring"])
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from ..dependencies import get_clients
+from ...infrastructure.client_registry import ClientRegistry
+
+metrics = APIRouter()
+
+
+@metrics.get("/metrics", include_in_schema=False)
+async def get_metrics(clients: ClientRegistry = Depends(get_clients)) -> Response:
+    """
+    Expose Prometheus metrics, refreshing the queue depth on each scrape.
+    """
+    await clients.mq.refresh_queue_depth()
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
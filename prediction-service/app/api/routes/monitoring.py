@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends
+from ..dependencies import get_clients, get_prediction_service
+from ...domain.prediction_service import PredictionService
+from ...infrastructure.client_registry import ClientRegistry
+from ...schemas.monitoring import (
+    CacheStats,
+    RedisMemoryReport,
+    StageStats,
+    TorchServeEndpointStats,
+)
+from ...schemas.pool import PoolStats
+
+monitoring = APIRouter()
+
+
+@monitoring.get("/pools", response_model=dict[str, PoolStats])
+async def get_pool_stats(
+    clients: ClientRegistry = Depends(get_clients),
+) -> dict[str, PoolStats]:
+    """
+    Report in-use, idle and waiting counts for the shared connection pools.
+    """
+    return clients.pool_stats()
+
+
+@monitoring.get("/redis-memory", response_model=RedisMemoryReport)
+async def get_redis_memory_report(
+    clients: ClientRegistry = Depends(get_clients),
+) -> RedisMemoryReport:
+    """
+    Report Redis memory usage with result key counts and bytes per model.
+    """
+    return await clients.redis_client.memory_report()
+
+
+@monitoring.get("/cache", response_model=dict[str, CacheStats])
+async def get_cache_stats(
+    clients: ClientRegistry = Depends(get_clients),
+) -> dict[str, CacheStats]:
+    """
+    Report prediction cache hits, misses and coalesced requests per model.
+    """
+    return await clients.prediction_cache.stats()
+
+
+@monitoring.get("/stages", response_model=dict[str, StageStats])
+async def get_stage_stats(
+    prediction_service: PredictionService = Depends(get_prediction_service),
+) -> dict[str, StageStats]:
+    """
+    Report p50/p90/p99 durations of each prediction lifecycle stage in seconds.
+    """
+    return await prediction_service.stage_stats()
+
+
+@monitoring.get("/torchserve", response_model=list[TorchServeEndpointStats])
+async def get_torchserve_endpoints(
+    clients: ClientRegistry = Depends(get_clients),
+) -> list[TorchServeEndpointStats]:
+    """
+    Report breaker state and outstanding calls per model for each TorchServe endpoint.
+    """
+    return clients.torchserve_client.endpoint_stats()
@@ -1,17 +1,30 @@
-from typing import Any, Dict, Union
-from fastapi import APIRouter, Depends
+from typing import Any, Dict, List, Union
+from fastapi import APIRouter, Body, Depends, Query, Request
+from fastapi import status
 from fastapi.responses import StreamingResponse
 from ..dependencies import get_prediction_service
-from ...domain.exceptions.domain_exceptions import InputRequiredException
+from ...core.config import settings
+from ...domain.exceptions.domain_exceptions import (
+    InputRequiredException,
+    PayloadTooLargeException,
+)
+from ...domain.prediction_results import PredictionJSONResponse
 from ...domain.prediction_service import PredictionService
 from ...schemas.prediction import (
+    BatchPredictionResponse,
+    BulkResultsRequest,
+    BulkResultsResponse,
+    CancelPredictionResponse,
     PendingPredictionResponse,
     PredictionRequest,
     PredictionResponse,
+    PredictionTimeline,
 )
 
 predictions = APIRouter()
 
+WAIT_PATTERN = r"^\d+(\.\d+)?(ms|s)?$"
+
 prediction_responses: Dict[Union[int, str], Dict[str, Any]] = {
     200: {
         "description": "A successful response will be either a JSON object with the prediction results or a binary file (such as an image or audio file). The content type of the response will indicate the type of the response.",
@@ -98,6 +111,66 @@ publish_prediction_responses: Dict[Union[int, str], Dict[str, Any]] = {
             }
         },
     },
+    429: {
+        "description": "The queue backlog would exceed the model's maximum wait. Retry after the number of seconds in the Retry-After header.",
+        "content": {
+            "application/json": {
+                "example": {
+                    "detail": "Estimated queue wait of 420s exceeds the 300s limit for model fastrcnn."
+                },
+            }
+        },
+    },
+    503: {
+        "description": "No workers are consuming the queue, or the request could not be queued. Retry after the number of seconds in the Retry-After header when present.",
+        "content": {
+            "application/json": {
+                "example": {"detail": "No workers are consuming prediction requests."},
+            }
+        },
+    },
+}
+
+cancel_prediction_responses: Dict[Union[int, str], Dict[str, Any]] = {
+    404: {
+        "description": "Not Found",
+        "content": {
+            "application/json": {
+                "example": {"detail": "No result found for inference_id example_id"}
+            }
+        },
+    },
+    409: {
+        "description": "The prediction has already completed or failed.",
+        "content": {
+            "application/json": {
+                "example": {
+                    "detail": "Prediction example_id cannot be cancelled, it is completed."
+                }
+            }
+        },
+    },
+}
+
+sync_prediction_responses: Dict[Union[int, str], Dict[str, Any]] = {
+    200: prediction_responses[200],
+    202: {
+        "description": "All synchronous inference slots are busy, so the request was queued. Poll the returned inference_id for the result.",
+        "content": {
+            "application/json": {"example": {"inference_id": "example_id"}}
+        },
+    },
+    422: prediction_responses[422],
+    504: {
+        "description": "Gateway Timeout",
+        "content": {
+            "application/json": {
+                "example": {
+                    "detail": "Synchronous prediction exceeded its deadline."
+                },
+            }
+        },
+    },
 }
 
 
@@ -119,17 +192,175 @@ async def make_prediction(
     return PendingPredictionResponse(inference_id=inference_id)
 
 
+@predictions.post("/batch", response_model=BatchPredictionResponse)
+async def make_batch_prediction(
+    prediction_requests: List[Dict[str, Any]] = Body(...),
+    prediction_service: PredictionService = Depends(get_prediction_service),
+) -> BatchPredictionResponse:
+    """
+    Queue many prediction requests at once, reporting an inference_id or an
+    error per item.
+    """
+    check_bulk_size(len(prediction_requests))
+    items = await prediction_service.publish_predictions(prediction_requests)
+    return BatchPredictionResponse(items=items)
+
+
+@predictions.post("/results", response_model=BulkResultsResponse)
+async def get_bulk_results(
+    bulk_request: BulkResultsRequest,
+    prediction_service: PredictionService = Depends(get_prediction_service),
+) -> BulkResultsResponse:
+    """
+    Retrieve many prediction results in one call. Binary results report their
+    content type and size and are downloaded individually.
+    """
+    check_bulk_size(len(bulk_request.inference_ids))
+    items = await prediction_service.get_responses(bulk_request.inference_ids)
+    return BulkResultsResponse(items=items)
+
+
+@predictions.post(
+    "/upload",
+    response_model=PendingPredictionResponse,
+    responses=publish_prediction_responses,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/octet-stream": {
+                    "schema": {"type": "string", "format": "binary"}
+                }
+            },
+        }
+    },
+)
+async def upload_prediction(
+    request: Request,
+    prediction_model_name: str = Query(...),
+    prediction_service: PredictionService = Depends(get_prediction_service),
+) -> PendingPredictionResponse:
+    """
+    Stream an image in the raw request body and queue a prediction for it.
+    """
+    inference_id = await prediction_service.publish_upload(
+        prediction_model_name, request.stream()
+    )
+    return PendingPredictionResponse(inference_id=inference_id)
+
+
+@predictions.post(
+    "/sync",
+    response_model=PredictionResponse,
+    responses=sync_prediction_responses,
+)
+async def make_sync_prediction(
+    prediction_request: PredictionRequest,
+    prediction_service: PredictionService = Depends(get_prediction_service),
+) -> PredictionJSONResponse | PredictionResponse | StreamingResponse:
+    """
+    Run the prediction inline and return its output, or queue it when busy.
+    """
+    if not prediction_request.prediction_model_name:
+        raise InputRequiredException(field_name="prediction_model_name")
+    result = await prediction_service.try_make_sync_prediction(prediction_request)
+    if result is not None:
+        return result
+
+    inference_id = await prediction_service.publish_prediction(prediction_request)
+    return PredictionJSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=PendingPredictionResponse(inference_id=inference_id).dict(),
+    )
+
+
 @predictions.get(
     "/{inference_id}", response_model=PredictionResponse, responses=prediction_responses
 )
 async def get_result(
     inference_id: str,
+    wait: str | None = Query(
+        None,
+        pattern=WAIT_PATTERN,
+        description="Long-poll while pending for up to this long, e.g. 30s or 500ms.",
+    ),
     prediction_service: PredictionService = Depends(get_prediction_service),
-) -> PredictionResponse | StreamingResponse:
+) -> PredictionJSONResponse | PredictionResponse | StreamingResponse:
     """
     Retrieve the result of a prediction task by task_id.
     """
     if not inference_id:
         raise InputRequiredException(field_name="inference_id")
-    result = prediction_service.get_response_from_inference_id(inference_id)
+    if wait:
+        return await prediction_service.wait_for_response(
+            inference_id, parse_wait(wait, settings.LONG_POLL_MAX_WAIT_SECONDS)
+        )
+    result = await prediction_service.get_response_from_inference_id(inference_id)
     return result
+
+
+@predictions.delete(
+    "/{inference_id}",
+    response_model=CancelPredictionResponse,
+    responses=cancel_prediction_responses,
+)
+async def cancel_prediction(
+    inference_id: str,
+    prediction_service: PredictionService = Depends(get_prediction_service),
+) -> CancelPredictionResponse:
+    """
+    Cancel a queued or running prediction task. Workers skip it, or abort the
+    TorchServe call when it is already running.
+    """
+    return await prediction_service.cancel_prediction(inference_id)
+
+
+@predictions.get("/{inference_id}/timeline", response_model=PredictionTimeline)
+async def get_timeline(
+    inference_id: str,
+    prediction_service: PredictionService = Depends(get_prediction_service),
+) -> PredictionTimeline:
+    """
+    Retrieve the stage timestamps and durations recorded for a prediction task.
+    """
+    return await prediction_service.get_timeline(inference_id)
+
+
+@predictions.get("/{inference_id}/events", response_class=StreamingResponse)
+async def stream_result_events(
+    inference_id: str,
+    request: Request,
+    prediction_service: PredictionService = Depends(get_prediction_service),
+) -> StreamingResponse:
+    """
+    Stream Server-Sent Events for a prediction task until its result is stored.
+    """
+    await prediction_service.ensure_exists(inference_id)
+    events = prediction_service.stream_result_events(
+        inference_id,
+        str(request.url_for("get_result", inference_id=inference_id)),
+        settings.SSE_MAX_STREAM_SECONDS,
+        settings.SSE_HEARTBEAT_SECONDS,
+    )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def check_bulk_size(count: int):
+    if not count:
+        raise InputRequiredException(field_name="items")
+    if count > settings.BULK_MAX_ITEMS:
+        raise PayloadTooLargeException(
+            f"At most {settings.BULK_MAX_ITEMS} items are accepted per call."
+        )
+
+
+def parse_wait(wait: str, max_wait: float) -> float:
+    if wait.endswith("ms"):
+        seconds = float(wait[:-2]) / 1000
+    else:
+        seconds = float(wait.rstrip("s"))
+    return min(seconds, max_wait)
@@ -2,16 +2,22 @@ from fastapi import Request, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from ..domain.exceptions.domain_exceptions import (
+    ConflictException,
     EntityNotFoundException,
     InputRequiredException,
+    PayloadTooLargeException,
     ServerException,
+    TooManyRequestsException,
 )
 
 
-def create_error_response(status_code: int, detail: str):
+def create_error_response(
+    status_code: int, detail: str, headers: dict[str, str] | None = None
+):
     return JSONResponse(
         status_code=status_code,
         content={"detail": detail, "status_code": status_code},
+        headers=headers,
     )
 
 
@@ -33,5 +39,23 @@ async def input_required_exception_handler(
     return create_error_response(status.HTTP_400_BAD_REQUEST, exc.detail)
 
 
+async def conflict_exception_handler(request: Request, exc: ConflictException):
+    return create_error_response(status.HTTP_409_CONFLICT, exc.detail)
+
+
 async def server_exception_handler(request: Request, exc: ServerException):
-    return create_error_response(exc.status_code, exc.detail)
+    return create_error_response(exc.status_code, exc.detail, exc.headers)
+
+
+async def payload_too_large_exception_handler(
+    request: Request, exc: PayloadTooLargeException
+):
+    return create_error_response(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, exc.detail)
+
+
+async def too_many_requests_exception_handler(
+    request: Request, exc: TooManyRequestsException
+):
+    return create_error_response(
+        status.HTTP_429_TOO_MANY_REQUESTS, exc.detail, exc.headers
+    )
@@ -1,15 +1,21 @@
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from ..core.exception_handlers import (
+    conflict_exception_handler,
     entity_not_found_exception_handler,
     input_required_exception_handler,
+    payload_too_large_exception_handler,
     server_exception_handler,
+    too_many_requests_exception_handler,
     validation_exception_handler,
 )
 from ..domain.exceptions.domain_exceptions import (
+    ConflictException,
     EntityNotFoundException,
     InputRequiredException,
+    PayloadTooLargeException,
     ServerException,
+    TooManyRequestsException,
 )
 
 
@@ -20,3 +26,10 @@ def setup_exception_handlers(app: FastAPI):
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
     app.add_exception_handler(InputRequiredException, input_required_exception_handler)
     app.add_exception_handler(ServerException, server_exception_handler)
+    app.add_exception_handler(ConflictException, conflict_exception_handler)
+    app.add_exception_handler(
+        PayloadTooLargeException, payload_too_large_exception_handler
+    )
+    app.add_exception_handler(
+        TooManyRequestsException, too_many_requests_exception_handler
+    )
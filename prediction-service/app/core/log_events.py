@@ -0,0 +1,70 @@
+import json
+import random
+from loguru import logger
+from ..core.config import settings
+
+
+def summarize(value, max_chars: int) -> str:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... <{len(text)} chars>"
+
+
+class Payload:
+    """Defers summarizing a payload until a sink actually formats the message."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self) -> str:
+        return summarize(self.value, settings.LOG_PAYLOAD_MAX_CHARS)
+
+    def __format__(self, format_spec: str) -> str:
+        return str(self)
+
+
+def sampled(event: str) -> bool:
+    rate = settings.LOG_SAMPLE_RATES.get(event, 1.0)
+    return rate >= 1.0 or random.random() < rate
+
+
+def log_event(event: str, message: str, *args, level: str = "INFO", **fields):
+    """Log a hot-path event with lazy `{}` formatting and per-event sampling.
+
+    Payload arguments should be wrapped in `Payload` so they are only
+    summarized when the record reaches a sink.
+    """
+    if not sampled(event):
+        return
+    logger.opt(depth=1).log(level, message, *args, event=event, **fields)
+
+
+class JsonSink:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, message):
+        record = message.record
+        self.stream.write(
+            json.dumps(
+                {
+                    "time": record["time"].isoformat(),
+                    "level": record["level"].name,
+                    "logger": record["name"],
+                    "function": record["function"],
+                    "line": record["line"],
+                    "message": record["message"],
+                    **record["extra"],
+                },
+                default=str,
+            )
+            + "\n"
+        )
+
+    def flush(self):
+        self.stream.flush()
@@ -1,6 +1,8 @@
 import logging
+import sys
 from loguru import logger
 from .intercept_handler import InterceptHandler
+from .log_events import JsonSink
 from ..core.config import settings
 
 
@@ -11,14 +13,26 @@ def setup_logging():
     level = settings.LOG_LEVEL
     logger_format = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
 
-    logger.add(
-        log_path,
-        rotation=rotation,
-        retention=retention,
-        enqueue=True,
-        level=level,
-        format=logger_format,
-    )
+    if settings.LOG_FORMAT == "json":
+        logger.remove()
+        logger.add(JsonSink(sys.stderr), enqueue=True, level=level, format="{message}")
+        logger.add(
+            log_path,
+            rotation=rotation,
+            retention=retention,
+            enqueue=True,
+            level=level,
+            serialize=True,
+        )
+    else:
+        logger.add(
+            log_path,
+            rotation=rotation,
+            retention=retention,
+            enqueue=True,
+            level=level,
+            format=logger_format,
+        )
 
     logging.getLogger("uvicorn").handlers = [InterceptHandler()]
     logging.getLogger("uvicorn.access").handlers = [InterceptHandler()]
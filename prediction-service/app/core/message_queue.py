@@ -1,63 +1,366 @@
 import asyncio
-from aio_pika import connect, Message, DeliveryMode
+import time
+from aio_pika import connect_robust, Message, DeliveryMode
+from aio_pika.exceptions import AMQPConnectionError
 from loguru import logger
 from ..core.config import settings
+from ..core.log_events import Payload, log_event
+from ..core.metrics import QUEUE_DEPTH
+from ..core.publisher import ConfirmingPublisher
+from ..core.scheduling import WeightedFairScheduler
+from ..domain.exceptions.domain_exceptions import MessagePublishException
+from ..infrastructure.serialization import (
+    JSON_CODEC,
+    JsonCodec,
+    MsgpackCodec,
+    codec_for,
+)
+from ..schemas.pool import PoolStats
 import backoff
 
+# What connecting raises while RabbitMQ is down or not up yet. Older aiormq
+# releases do not derive AMQPConnectionError from ConnectionError.
+CONNECTION_ERRORS = (AMQPConnectionError, ConnectionError)
+
 
 class AsyncMessageQueue:
-    def __init__(self):
+    def __init__(
+        self,
+        channel_pool_size: int = settings.RABBITMQ_CHANNEL_POOL_SIZE,
+        codec: JsonCodec | MsgpackCodec = JSON_CODEC,
+    ):
         self.url = settings.RABBITMQ_HOST
+        self.codec = codec
         self.queue_name = settings.INCOMING_QUEUE
+        self.model_queues = {
+            model: f"{settings.INCOMING_QUEUE}.{model}"
+            for model in settings.MODEL_QUEUES
+        }
+        self.max_priority = settings.QUEUE_MAX_PRIORITY
+        self.dead_letter_queue = settings.DEAD_LETTER_QUEUE
+        self.retry_delays = settings.WORKER_RETRY_DELAYS_SECONDS
         self.connection = None
         self.channel = None
+        self.publisher = ConfirmingPublisher(
+            channel_pool_size,
+            settings.RABBITMQ_PUBLISH_MAX_OUTSTANDING,
+            settings.RABBITMQ_PUBLISH_CONFIRM_TIMEOUT_SECONDS,
+        )
+        self._connection_lock = asyncio.Lock()
+
+    @property
+    def queue_names(self) -> list[str]:
+        return [self.queue_name, *self.model_queues.values()]
+
+    def queue_for(self, model_name: str) -> str:
+        return self.model_queues.get(model_name, self.queue_name)
+
+    @staticmethod
+    def retry_queue_name(queue_name: str, delay: float) -> str:
+        return f"{queue_name}.retry.{round(delay * 1000)}"
+
+    async def declare_retry_queues(self, channel, queue_name: str):
+        for delay in self.retry_delays:
+            await channel.declare_queue(
+                self.retry_queue_name(queue_name, delay),
+                durable=True,
+                arguments={
+                    "x-message-ttl": round(delay * 1000),
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": queue_name,
+                },
+            )
+
+    async def declare_queue(self, channel, queue_name: str):
+        arguments = {"x-max-priority": self.max_priority} if self.max_priority else None
+        return await channel.declare_queue(
+            queue_name, durable=True, arguments=arguments
+        )
+
+    @backoff.on_exception(backoff.expo, CONNECTION_ERRORS, max_time=60)
+    async def open(self):
+        async with self._connection_lock:
+            if self.connection and not self.connection.is_closed:
+                return
+            self.connection = await connect_robust(self.url)
+            async with self.connection.channel() as channel:
+                for queue_name in self.queue_names:
+                    await self.declare_queue(channel, queue_name)
+                    await self.declare_retry_queues(channel, queue_name)
+                await channel.declare_queue(self.dead_letter_queue, durable=True)
+            await self.publisher.start(self.connection)
+            logger.info(f"Connected to RabbitMQ and declared {self.queue_names}.")
+
+    async def ensure_open(self):
+        if self.connection:
+            return
+        try:
+            await self.open()
+        except CONNECTION_ERRORS as e:
+            logger.error(f"Connection to RabbitMQ failed. {str(e)}")
+            raise MessagePublishException("Failed to connect to RabbitMQ.") from e
+
+    async def connect(self, prefetch_count: int = 1):
+        queues = await self.connect_queues([self.queue_name], prefetch_count)
+        return queues.get(self.queue_name)
 
-    @backoff.on_exception(backoff.expo, ConnectionRefusedError, max_time=60)
-    async def connect(self):
+    async def connect_queues(
+        self, queue_names: list[str], prefetch_count: int = 1
+    ) -> dict:
         try:
-            self.connection = await connect(self.url)
+            await self.open()
             self.channel = await self.connection.channel()
-            queue = await self.channel.declare_queue(self.queue_name, durable=True)
-            await self.channel.set_qos(prefetch_count=1)
-            logger.info("Connected to RabbitMQ and declared the queue.")
-            return queue
-        except ConnectionRefusedError as e:
+            await self.channel.set_qos(prefetch_count=prefetch_count)
+            queues = {
+                queue_name: await self.declare_queue(self.channel, queue_name)
+                for queue_name in queue_names
+            }
+            logger.info(f"Opened the consumer channel for {queue_names}.")
+            return queues
+        except CONNECTION_ERRORS as e:
             logger.error(f"Connection to RabbitMQ failed. {str(e)}")
+            return {}
 
     async def disconnect(self):
+        await self.publisher.close()
         if self.connection:
             await self.connection.close()
             logger.info("Disconnected from RabbitMQ.")
 
+    async def queue_status(self, queue_name: str | None = None) -> tuple[int, int]:
+        if not self.connection:
+            await self.open()
+        async with self.connection.channel() as channel:
+            queue = await channel.declare_queue(
+                queue_name or self.queue_name, passive=True
+            )
+            result = queue.declaration_result
+            return result.message_count, result.consumer_count
+
+    async def queue_depth(self, queue_name: str | None = None) -> int:
+        message_count, _ = await self.queue_status(queue_name)
+        return message_count
+
+    async def refresh_queue_depth(self):
+        for queue_name in self.queue_names:
+            try:
+                QUEUE_DEPTH.labels(queue_name).set(await self.queue_depth(queue_name))
+            except Exception as e:
+                logger.error(f"Failed to read the depth of {queue_name} - {e}")
+
+    def pool_stats(self) -> PoolStats:
+        return self.publisher.stats()
+
+    def build_message(
+        self,
+        body: dict,
+        inference_id: str,
+        priority: int = 0,
+        deadline_seconds: float | None = None,
+    ) -> Message:
+        published_at = time.time()
+        headers = {"inference_id": inference_id, "published_at": published_at}
+        if deadline_seconds is not None:
+            headers["deadline"] = published_at + deadline_seconds
+        return Message(
+            body=self.codec.dumps(body),
+            headers=headers,
+            content_type=self.codec.content_type,
+            message_id=inference_id,
+            delivery_mode=DeliveryMode.PERSISTENT,
+            priority=min(priority, self.max_priority),
+        )
+
     async def publish(
-        self, body: str, inference_id: str, routing_key: str | None = None
+        self,
+        body: dict,
+        inference_id: str,
+        routing_key: str | None = None,
+        priority: int = 0,
+        deadline_seconds: float | None = None,
     ):
-        logger.info(
-            f"Publishing message with inference_id {inference_id}. Message: {body}"
+        log_event(
+            "mq.publish",
+            "Publishing message with inference_id {}. Message: {}",
+            inference_id,
+            Payload(body),
         )
         routing_key = routing_key or self.queue_name
-        if not self.channel or not self.connection:
-            await self.connect()
+        await self.ensure_open()
+
+        await self.publisher.publish(
+            self.build_message(body, inference_id, priority, deadline_seconds),
+            routing_key,
+        )
+        log_event(
+            "mq.publish",
+            "Confirmed message to {}. Message: {}",
+            routing_key,
+            Payload(body),
+        )
 
-        message = Message(
-            body=body.encode(),
-            headers={"inference_id": inference_id},
+    @staticmethod
+    def copy_message(message, headers: dict) -> Message:
+        return Message(
+            body=message.body,
+            headers={**message.headers, **headers},
+            content_type=message.content_type,
+            message_id=message.message_id,
             delivery_mode=DeliveryMode.PERSISTENT,
+            priority=message.priority or 0,
+        )
+
+    @staticmethod
+    def decode(message) -> dict:
+        """Decode a message body with the codec its content type names, so
+        messages from publishers on another codec can still be read."""
+        return codec_for(message.content_type).loads(message.body)
+
+    async def retry(self, message, error: str) -> bool:
+        """Republish a failed message through the retry queue for its attempt.
+
+        The retry queue holds it for the attempt's delay and then dead-letters
+        it back to the queue it came from. Returns False once the retries
+        are exhausted.
+        """
+        attempt = int(message.headers.get("retry_count", 0))
+        if attempt >= len(self.retry_delays):
+            return False
+        queue_name = message.routing_key or self.queue_name
+        delay = self.retry_delays[attempt]
+        await self.publisher.publish(
+            self.copy_message(
+                message, {"retry_count": attempt + 1, "last_error": error}
+            ),
+            self.retry_queue_name(queue_name, delay),
         )
+        logger.warning(
+            f"Retrying inference_id {message.headers.get('inference_id')} in "
+            f"{delay}s (attempt {attempt + 1} of {len(self.retry_delays)}): {error}"
+        )
+        return True
+
+    async def dead_letter(self, message, error: str):
+        await self.publisher.publish(
+            self.copy_message(
+                message,
+                {
+                    "last_error": error,
+                    "original_queue": message.routing_key or self.queue_name,
+                    "failed_at": time.time(),
+                },
+            ),
+            self.dead_letter_queue,
+        )
+        logger.error(
+            f"Dead-lettered inference_id {message.headers.get('inference_id')} "
+            f"to {self.dead_letter_queue}: {error}"
+        )
+
+    async def publish_many(
+        self, messages: list[tuple[dict, str, str | None, int, float | None]]
+    ) -> list[Exception | None]:
+        logger.info(f"Publishing {len(messages)} messages with pipelined confirms.")
+        try:
+            await self.ensure_open()
+        except MessagePublishException as e:
+            return [e for _ in messages]
 
-        await self.channel.default_exchange.publish(
-            message,
-            routing_key=routing_key,
+        results = await asyncio.gather(
+            *(
+                self.publisher.publish(
+                    self.build_message(body, inference_id, priority, deadline),
+                    routing_key or self.queue_name,
+                )
+                for body, inference_id, routing_key, priority, deadline in messages
+            ),
+            return_exceptions=True,
         )
-        logger.info(f"Published message to {routing_key}. Message: {body}")
+        errors = [r if isinstance(r, Exception) else None for r in results]
+        logger.info(f"Confirmed {errors.count(None)} of {len(messages)} messages.")
+        return errors
 
     async def consume(self, callback, queue=None):
         logger.info("Starting consuming the message...")
         queue = await self.connect() if not queue else queue
 
         async for message in queue:
-            async with message.process():
-                logger.info(
-                    f"Consuming message with inference_id {message.headers['inference_id']}. Message: {message.body.decode()}"
+            async with message.process(ignore_processed=True):
+                log_event(
+                    "mq.consume",
+                    "Consuming message with inference_id {}. Message: {}",
+                    message.headers["inference_id"],
+                    Payload(message.body),
                 )
                 await callback(message)
+
+    async def consume_concurrently(
+        self,
+        callback,
+        stop_event: asyncio.Event,
+        max_in_flight: int = settings.WORKER_MAX_IN_FLIGHT,
+        queues: dict | None = None,
+        weights: dict[str, int] | None = None,
+    ):
+        if not queues:
+            queues = await self.connect_queues(
+                self.queue_names, settings.WORKER_PREFETCH_COUNT
+            )
+        weights = weights or {}
+        logger.info(
+            f"Starting consuming {list(queues)} with up to {max_in_flight} in flight..."
+        )
+        in_flight = asyncio.Semaphore(max_in_flight)
+        scheduler = WeightedFairScheduler(
+            {queue_name: weights.get(queue_name, 1) for queue_name in queues}
+        )
+        tasks: set[asyncio.Task] = set()
+
+        async def handle(message):
+            try:
+                async with message.process(ignore_processed=True):
+                    log_event(
+                        "mq.consume",
+                        "Consuming message with inference_id {}. Message: {}",
+                        message.headers["inference_id"],
+                        Payload(message.body),
+                    )
+                    await callback(message)
+            finally:
+                in_flight.release()
+
+        def buffer_into(queue_name: str):
+            async def on_message(message):
+                scheduler.put(queue_name, message)
+
+            return on_message
+
+        async def dispatch():
+            while True:
+                await in_flight.acquire()
+                try:
+                    message = await scheduler.get()
+                except asyncio.CancelledError:
+                    in_flight.release()
+                    raise
+                task = asyncio.create_task(handle(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        consumer_tags = {
+            queue_name: await queue.consume(buffer_into(queue_name))
+            for queue_name, queue in queues.items()
+        }
+        dispatcher = asyncio.create_task(dispatch())
+        await stop_event.wait()
+
+        logger.info(f"Stopping consumer, waiting for {len(tasks)} in-flight messages.")
+        for queue_name, consumer_tag in consumer_tags.items():
+            await queues[queue_name].cancel(consumer_tag)
+        dispatcher.cancel()
+        await asyncio.gather(dispatcher, return_exceptions=True)
+        for message in scheduler.drain():
+            await message.reject(requeue=True)
+        while tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info("Consumer stopped.")
@@ -0,0 +1,82 @@
+from prometheus_client import Counter, Gauge, Histogram
+from ..core.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+OTHER_LABEL = "other"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "prediction_api_request_duration_seconds",
+    "Latency of API requests by route handler.",
+    ["method", "handler", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+PUBLISH_DURATION = Histogram(
+    "prediction_publish_duration_seconds",
+    "Time to publish a prediction request and receive the broker confirm.",
+    ["outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+QUEUE_DEPTH = Gauge(
+    "prediction_queue_depth",
+    "Messages waiting in the prediction request queue.",
+    ["queue"],
+)
+WORKER_IN_FLIGHT = Gauge(
+    "prediction_worker_in_flight",
+    "Prediction requests currently being processed by the worker.",
+)
+TORCHSERVE_DURATION = Histogram(
+    "torchserve_request_duration_seconds",
+    "Latency of TorchServe prediction calls by model and status.",
+    ["model", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+TORCHSERVE_RATE_LIMITED = Counter(
+    "torchserve_rate_limited_total",
+    "Prediction calls rejected after waiting in the TorchServe limiter queue.",
+    ["model"],
+)
+STAGE_DURATION = Histogram(
+    "prediction_stage_duration_seconds",
+    "Time spent in each stage of the prediction lifecycle.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+TORCHSERVE_CONCURRENCY_LIMIT = Gauge(
+    "torchserve_concurrency_limit",
+    "Current adaptive concurrency limit for TorchServe calls in this process.",
+)
+WORKER_FAILURES = Counter(
+    "prediction_worker_failures_total",
+    "Failed predictions by whether they were scheduled for a retry or dead-lettered.",
+    ["outcome"],
+)
+WORKER_DROPPED = Counter(
+    "prediction_worker_dropped_total",
+    "Predictions dropped by the worker because they expired or were cancelled.",
+    ["reason"],
+)
+TORCHSERVE_ENDPOINT_AVAILABLE = Gauge(
+    "torchserve_endpoint_available",
+    "Whether a TorchServe endpoint is taking calls (0 while its breaker is open).",
+    ["endpoint"],
+)
+STORE_RESPONSE_DURATION = Histogram(
+    "prediction_store_response_duration_seconds",
+    "Time spent serializing and storing prediction results in Redis.",
+    buckets=LATENCY_BUCKETS,
+)
+
+_model_labels: set[str] = set()
+
+
+def model_label(model_name: str) -> str:
+    """Bound the model label to configured models, or to the first ones seen."""
+    if settings.METRICS_MODELS:
+        return model_name if model_name in settings.METRICS_MODELS else OTHER_LABEL
+    if model_name in _model_labels:
+        return model_name
+    if len(_model_labels) < settings.METRICS_MAX_MODEL_LABELS:
+        _model_labels.add(model_name)
+        return model_name
+    return OTHER_LABEL
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from aio_pika import Message
+from aio_pika.abc import AbstractChannel, AbstractRobustConnection
+from aio_pika.exceptions import (
+    AMQPError,
+    ChannelInvalidStateError,
+    DeliveryError,
+    PublishError,
+)
+from loguru import logger
+from ..core.metrics import PUBLISH_DURATION
+from ..domain.exceptions.domain_exceptions import MessagePublishException
+from ..infrastructure.pool_gauge import PoolGauge
+from ..schemas.pool import PoolStats
+
+
+class ConfirmingPublisher:
+    def __init__(
+        self, pool_size: int, max_outstanding: int, confirm_timeout: float
+    ):
+        self.pool_size = pool_size
+        self.max_outstanding = max_outstanding
+        self.confirm_timeout = confirm_timeout
+        self.connection: AbstractRobustConnection | None = None
+        self._channels: list[AbstractChannel | None] = [None] * pool_size
+        self._outstanding = [0] * pool_size
+        self._channel_locks = [asyncio.Lock() for _ in range(pool_size)]
+        self._gauge = PoolGauge(pool_size * max_outstanding)
+
+    async def start(self, connection: AbstractRobustConnection):
+        self.connection = connection
+        for slot in range(self.pool_size):
+            await self._channel(slot)
+        logger.info(f"Opened {self.pool_size} confirm-mode publisher channels.")
+
+    async def close(self):
+        for channel in self._channels:
+            if channel and not channel.is_closed:
+                await channel.close()
+        self._channels = [None] * self.pool_size
+
+    def stats(self) -> PoolStats:
+        open_channels = sum(
+            1 for channel in self._channels if channel and not channel.is_closed
+        )
+        return self._gauge.stats(open_channels * self.max_outstanding)
+
+    async def _channel(self, slot: int) -> AbstractChannel:
+        channel = self._channels[slot]
+        if channel and not channel.is_closed:
+            return channel
+        async with self._channel_locks[slot]:
+            channel = self._channels[slot]
+            if not channel or channel.is_closed:
+                channel = await self.connection.channel(
+                    publisher_confirms=True, on_return_raises=True
+                )
+                self._channels[slot] = channel
+            return channel
+
+    def _least_outstanding_slot(self) -> int:
+        return min(range(self.pool_size), key=self._outstanding.__getitem__)
+
+    async def publish(self, message: Message, routing_key: str):
+        """Publish on the least busy channel and wait for the broker to confirm."""
+        start_time = time.perf_counter()
+        outcome = "failed"
+        async with self._gauge.acquire():
+            slot = self._least_outstanding_slot()
+            self._outstanding[slot] += 1
+            try:
+                channel = await self._channel(slot)
+                await channel.default_exchange.publish(
+                    message,
+                    routing_key=routing_key,
+                    mandatory=True,
+                    timeout=self.confirm_timeout,
+                )
+                outcome = "confirmed"
+            except PublishError as e:
+                raise MessagePublishException(
+                    f"Message {message.message_id} was returned as unroutable "
+                    f"by {routing_key}: {e.frame.reply_text}"
+                )
+            except DeliveryError:
+                raise MessagePublishException(
+                    f"Message {message.message_id} was rejected by the broker."
+                )
+            except asyncio.TimeoutError:
+                raise MessagePublishException(
+                    f"Message {message.message_id} was not confirmed within "
+                    f"{self.confirm_timeout}s."
+                )
+            except (AMQPError, ChannelInvalidStateError, ConnectionError) as e:
+                raise MessagePublishException(
+                    f"Message {message.message_id} could not be published - {e}"
+                )
+            finally:
+                self._outstanding[slot] -= 1
+                PUBLISH_DURATION.labels(outcome).observe(
+                    time.perf_counter() - start_time
+                )
@@ -0,0 +1,55 @@
+import asyncio
+import heapq
+import itertools
+from typing import Any
+
+
+class WeightedFairScheduler:
+    """Interleaves messages from several queues in proportion to their weights.
+
+    Picks among the queues with buffered messages by smooth weighted round
+    robin, so a backlogged queue cannot starve the others and an idle queue
+    does not hold them back. Within a queue, buffered messages are handed out
+    by priority, then in arrival order.
+    """
+
+    def __init__(self, weights: dict[str, int]):
+        self.weights = {name: max(weight, 1) for name, weight in weights.items()}
+        self._buffers: dict[str, list] = {name: [] for name in weights}
+        self._credits = {name: 0 for name in weights}
+        self._sequence = itertools.count()
+        self._available = asyncio.Event()
+
+    def __len__(self) -> int:
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    def put(self, name: str, message: Any):
+        priority = getattr(message, "priority", None) or 0
+        heapq.heappush(
+            self._buffers[name], (-priority, next(self._sequence), message)
+        )
+        self._available.set()
+
+    def _pick(self) -> str:
+        ready = [name for name, buffer in self._buffers.items() if buffer]
+        for name in self._credits:
+            if name in ready:
+                self._credits[name] += self.weights[name]
+            else:
+                self._credits[name] = 0
+        chosen = max(ready, key=self._credits.__getitem__)
+        self._credits[chosen] -= sum(self.weights[name] for name in ready)
+        return chosen
+
+    async def get(self) -> Any:
+        while not len(self):
+            self._available.clear()
+            await self._available.wait()
+        return heapq.heappop(self._buffers[self._pick()])[2]
+
+    def drain(self) -> list[Any]:
+        messages = []
+        for buffer in self._buffers.values():
+            messages.extend(entry[2] for entry in sorted(buffer))
+            buffer.clear()
+        return messages
@@ -16,3 +16,32 @@ class InputRequiredException(CustomBaseException):
     def __init__(self, field_name: str, detail: str | None = None):
         detail = detail if detail is not None else f"The '{field_name}' field is required."
         super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class ConflictException(CustomBaseException):
+    def __init__(self, detail: str = "Conflict"):
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class PayloadTooLargeException(CustomBaseException):
+    def __init__(self, detail: str = "Payload too large"):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+class MessagePublishException(ServerException):
+    def __init__(self, detail: str = "Failed to publish the message"):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+
+
+class CapacityExceededException(ServerException):
+    def __init__(self, detail: str = "Service is at capacity", retry_after: int | None = None):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+        if retry_after is not None:
+            self.headers = {"Retry-After": str(retry_after)}
+
+
+class TooManyRequestsException(CustomBaseException):
+    def __init__(self, detail: str = "Too many requests", retry_after: int | None = None):
+        super().__init__(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=detail)
+        if retry_after is not None:
+            self.headers = {"Retry-After": str(retry_after)}
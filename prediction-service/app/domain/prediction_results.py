@@ -0,0 +1,74 @@
+from typing import Any
+from fastapi.responses import Response, StreamingResponse
+from ..infrastructure.serialization import JSON_CODEC
+
+GENERIC_MEDIA_TYPES = ("", "application/octet-stream", "text/plain")
+
+
+def media_type(content_type: str | None) -> str:
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def is_json_media_type(value: str) -> bool:
+    return value == "application/json" or value.endswith("+json")
+
+
+def looks_like_json(content: bytes, sniff_bytes: int) -> bool:
+    return content[:sniff_bytes].lstrip()[:1] in (b"{", b"[")
+
+
+async def iter_chunks(view: memoryview, chunk_size: int):
+    for start in range(0, len(view), chunk_size):
+        yield view[start : start + chunk_size]
+
+
+class PredictionJSONResponse(Response):
+    """A JSON prediction result held as its encoded body.
+
+    TorchServe's output is spliced into the body as raw bytes instead of
+    being parsed and re-serialized, and the body is stored and served as is.
+    Other content is rendered with the fastest installed JSON codec.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (dict, list)):
+            return JSON_CODEC.dumps(content)
+        return super().render(content)
+
+    @classmethod
+    def from_results(cls, model_name: str, results: bytes) -> "PredictionJSONResponse":
+        return cls(
+            b"".join(
+                (
+                    b'{"prediction_model_name":',
+                    JSON_CODEC.dumps(model_name),
+                    b',"results":',
+                    results,
+                    b"}",
+                )
+            )
+        )
+
+    def data(self) -> dict:
+        return JSON_CODEC.loads(self.body)
+
+
+class BinaryPredictionResponse(StreamingResponse):
+    """A binary prediction result streamed in slices of the one buffer it was
+    read into, which is also what gets stored, so neither copies it."""
+
+    def __init__(
+        self,
+        content: bytes | memoryview,
+        media_type: str,
+        chunk_size: int,
+        headers: dict | None = None,
+    ):
+        self.content = content
+        super().__init__(
+            iter_chunks(memoryview(content), chunk_size),
+            media_type=media_type,
+            headers={"Content-Length": str(len(content)), **(headers or {})},
+        )
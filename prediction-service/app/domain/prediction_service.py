@@ -1,181 +1,786 @@
+import asyncio
 import base64
-import json
+import hashlib
 import pickle
+import tempfile
+import time
 import uuid
 import magic
+from typing import Any, AsyncIterator
 import mimetypes
+import httpx
 from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
 from loguru import logger
+from ..core.config import settings
+from ..core.log_events import Payload, log_event
+from ..core.metrics import STAGE_DURATION, STORE_RESPONSE_DURATION
 from ..core.message_queue import AsyncMessageQueue
+from ..infrastructure.admission_controller import AdmissionController
+from ..infrastructure.blob_store import BlobStore
 from ..infrastructure.torchserve_client import TorchServeClient
+from ..infrastructure.prediction_cache import PredictionCache
 from ..infrastructure.redis_client import RedisClient
+from ..infrastructure.result_notifier import ResultNotifier
+from ..infrastructure.serialization import JSON_CODEC, DecodeError, codec_for
 from ..schemas.prediction import (
+    BatchItemResult,
+    BulkResultItem,
+    CancelPredictionResponse,
     PredictionRequest,
     PredictionResponse,
+    PredictionTimeline,
+    QueuedPredictionRequest,
+)
+from ..schemas.monitoring import StageStats
+from ..domain.prediction_results import (
+    GENERIC_MEDIA_TYPES,
+    BinaryPredictionResponse,
+    PredictionJSONResponse,
+    is_json_media_type,
+    looks_like_json,
+    media_type,
+)
+from ..domain.timeline import (
+    STAGES,
+    percentile,
+    samples_key,
+    stage_durations,
+    timestamps,
 )
 from ..domain.exceptions.domain_exceptions import (
+    CapacityExceededException,
+    ConflictException,
     EntityNotFoundException,
+    InputRequiredException,
+    MessagePublishException,
+    PayloadTooLargeException,
     ServerException,
+    TooManyRequestsException,
 )
 
 
 class PredictionService:
+    sync_slots = asyncio.Semaphore(settings.SYNC_MAX_CONCURRENCY)
+
     def __init__(
         self,
         mq: AsyncMessageQueue,
         torchserve_client: TorchServeClient,
         redis_client: RedisClient,
+        result_notifier: ResultNotifier | None = None,
+        prediction_cache: PredictionCache | None = None,
+        blob_store: BlobStore | None = None,
+        admission_controller: AdmissionController | None = None,
     ):
         self.mq = mq
         self.torchserve_client = torchserve_client
         self.redis_client = redis_client
+        self.result_notifier = result_notifier
+        self.prediction_cache = prediction_cache
+        self.blob_store = blob_store
+        self.admission_controller = admission_controller
+
+    async def admit(self, model_name: str) -> None:
+        if self.admission_controller:
+            await self.admission_controller.admit(model_name)
+
+    async def admit_request(self, request: PredictionRequest) -> None:
+        try:
+            await self.admit(request.prediction_model_name)
+        except (CapacityExceededException, TooManyRequestsException):
+            await self.release_request(request)
+            raise
+
+    async def publish_prediction(
+        self,
+        request: PredictionRequest,
+        image_digest: str | None = None,
+        admitted: bool = False,
+    ) -> str:
+        cache_key = None
+        if self.prediction_cache and self.prediction_cache.is_enabled(
+            request.prediction_model_name
+        ):
+            cache_key = self.prediction_cache.key_for(
+                request.prediction_model_name,
+                image_digest or await self.compute_image_digest(request),
+            )
+        elif not admitted:
+            await self.admit_request(request)
 
-    async def publish_prediction(self, request: PredictionRequest) -> str:
         inference_id = str(uuid.uuid4())
-        logger.info(
-            f"Publishing prediction with request {request} and inference_id: {inference_id}"
-        )
-        await self.publish_to_queue(request, inference_id)
-        logger.info(
-            f"Storing result default status pending in redis with inference_id: {inference_id}"
+        metadata = {
+            "prediction_model_name": request.prediction_model_name,
+            "status": "pending",
+            "published_at": time.time(),
+        }
+        if cache_key:
+            metadata["cache_key"] = cache_key
+
+        log_event(
+            "prediction.publish",
+            "Storing result default status pending in redis with inference_id: {}",
+            inference_id,
         )
-        self.redis_client.set(
+        value, record_metadata = self.pending_record(request.prediction_model_name)
+        try:
+            await self.redis_client.set_with_metadata(
+                inference_id,
+                value,
+                {**metadata, **record_metadata},
+                ttl=settings.RESULT_PENDING_TTL_SECONDS,
+            )
+        except Exception:
+            await self.release_request(request)
+            raise ServerException(
+                status_code=503, detail="Failed to record the prediction request."
+            )
+
+        if cache_key:
+            cached_id = await self.prediction_cache.claim(
+                cache_key, request.prediction_model_name, inference_id
+            )
+            if cached_id:
+                await self.redis_client.delete(
+                    inference_id, self.redis_client.metadata_key(inference_id)
+                )
+                await self.release_request(request)
+                return cached_id
+            # Admitted only now that the request is not coalesced onto an
+            # existing prediction and will be published.
+            if not admitted:
+                try:
+                    await self.admit_request(request)
+                except (CapacityExceededException, TooManyRequestsException):
+                    await self.redis_client.delete(
+                        inference_id, self.redis_client.metadata_key(inference_id)
+                    )
+                    raise
+
+        log_event(
+            "prediction.publish",
+            "Publishing prediction with request {} and inference_id: {}",
+            Payload(request),
             inference_id,
-            json.dumps(
-                {
-                    "prediction_model_name": request.prediction_model_name,
-                    "results": "Pending",
-                }
-            ),
         )
+        try:
+            await self.publish_to_queue(request, inference_id)
+        except MessagePublishException:
+            await self.redis_client.delete(
+                inference_id, self.redis_client.metadata_key(inference_id)
+            )
+            await self.release_request(request)
+            raise
         return inference_id
 
+    async def publish_upload(
+        self, model_name: str, chunks: AsyncIterator[bytes]
+    ) -> str:
+        await self.admit(model_name)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.SpooledTemporaryFile(
+            max_size=settings.UPLOAD_SPOOL_MAX_BYTES
+        ) as spool:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > settings.UPLOAD_MAX_BYTES:
+                    raise PayloadTooLargeException(
+                        f"Image exceeds the {settings.UPLOAD_MAX_BYTES} byte limit."
+                    )
+                digest.update(chunk)
+                if size > settings.UPLOAD_SPOOL_MAX_BYTES:
+                    # The spool is on disk from here on.
+                    await asyncio.to_thread(spool.write, chunk)
+                else:
+                    spool.write(chunk)
+            if not size:
+                raise InputRequiredException(field_name="image")
+            blob_key = await self.blob_store.put(spool)
+
+        logger.info(f"Uploaded {size} byte image as blob {blob_key}")
+        return await self.publish_prediction(
+            QueuedPredictionRequest(
+                prediction_model_name=model_name, blob_key=blob_key
+            ),
+            image_digest=digest.hexdigest(),
+            admitted=True,
+        )
+
+    @staticmethod
+    def blob_key(request: PredictionRequest) -> str | None:
+        if isinstance(request, QueuedPredictionRequest):
+            return request.blob_key
+        return None
+
+    def open_image(self, request: PredictionRequest) -> AsyncIterator[bytes]:
+        blob_key = self.blob_key(request)
+        if blob_key:
+            return self.blob_store.open_stream(blob_key, settings.UPLOAD_CHUNK_SIZE)
+        return self.torchserve_client.iter_image_file(
+            request.image_path, settings.UPLOAD_CHUNK_SIZE
+        )
+
+    async def compute_image_digest(self, request: PredictionRequest) -> str:
+        digest = hashlib.sha256()
+        async for chunk in self.open_image(request):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    async def release_request(self, request: PredictionRequest) -> None:
+        blob_key = self.blob_key(request)
+        if blob_key:
+            await self.blob_store.delete(blob_key)
+
+    async def publish_predictions(
+        self, items: list[dict[str, Any]]
+    ) -> list[BatchItemResult]:
+        results = [BatchItemResult(index=index) for index in range(len(items))]
+        pending: list[tuple[int, PredictionRequest, str]] = []
+        for index, item in enumerate(items):
+            try:
+                request = PredictionRequest(**item)
+            except ValidationError as e:
+                results[index].error = "; ".join(err["msg"] for err in e.errors())
+                continue
+            if self.prediction_cache and self.prediction_cache.is_enabled(
+                request.prediction_model_name
+            ):
+                try:
+                    inference_id = await self.publish_prediction(request)
+                    results[index].inference_id = inference_id
+                except (CapacityExceededException, TooManyRequestsException) as e:
+                    results[index].error = e.detail
+                except Exception as e:
+                    results[index].error = str(e)
+                continue
+            try:
+                await self.admit(request.prediction_model_name)
+            except (CapacityExceededException, TooManyRequestsException) as e:
+                results[index].error = e.detail
+                continue
+            pending.append((index, request, str(uuid.uuid4())))
+
+        if not pending:
+            return results
+
+        logger.info(f"Publishing {len(pending)} predictions in bulk")
+        published_at = time.time()
+        entries = []
+        for _, request, inference_id in pending:
+            value, record_metadata = self.pending_record(request.prediction_model_name)
+            entries.append(
+                (
+                    inference_id,
+                    value,
+                    {
+                        "prediction_model_name": request.prediction_model_name,
+                        "status": "pending",
+                        "published_at": published_at,
+                        **record_metadata,
+                    },
+                )
+            )
+        try:
+            await self.redis_client.set_many_with_metadata(
+                entries, ttl=settings.RESULT_PENDING_TTL_SECONDS
+            )
+        except Exception:
+            for index, request, _ in pending:
+                results[index].error = "Failed to record the prediction request."
+                await self.release_request(request)
+            return results
+        errors = await self.mq.publish_many(
+            [
+                (
+                    request.dict(),
+                    inference_id,
+                    self.mq.queue_for(request.prediction_model_name),
+                    request.priority,
+                    request.deadline_seconds,
+                )
+                for _, request, inference_id in pending
+            ]
+        )
+
+        failed_keys = []
+        for (index, request, inference_id), error in zip(pending, errors):
+            if error is None:
+                results[index].inference_id = inference_id
+            else:
+                logger.error(f"Failed to publish inference_id {inference_id}: {error}")
+                results[index].error = "Failed to publish the prediction request."
+                failed_keys.append(inference_id)
+                failed_keys.append(self.redis_client.metadata_key(inference_id))
+                await self.release_request(request)
+        if failed_keys:
+            await self.redis_client.delete(*failed_keys)
+        return results
+
+    async def get_responses(self, inference_ids: list[str]) -> list[BulkResultItem]:
+        logger.info(f"Retrieving {len(inference_ids)} prediction results in bulk")
+        stored = await self.redis_client.get_many_with_metadata(inference_ids)
+
+        items = []
+        for inference_id, (raw_result, metadata) in zip(inference_ids, stored):
+            item = BulkResultItem(inference_id=inference_id)
+            if raw_result is None:
+                item.error = f"No result found for inference_id {inference_id}"
+            elif metadata.get("type") == "binary":
+                item.content_type = metadata.get("content_type")
+                item.size = len(raw_result)
+            else:
+                try:
+                    result = self.build_result(raw_result, metadata)
+                    if isinstance(result, PredictionJSONResponse):
+                        item.result = result.data()
+                    elif isinstance(result, PredictionResponse):
+                        item.result = result.dict()
+                    else:
+                        item.content_type = result.media_type
+                except (ValueError, ValidationError) as e:
+                    item.error = f"Failed to decode result: {e}"
+            items.append(item)
+        return items
+
     async def make_prediction(
-        self, request: PredictionRequest
-    ) -> PredictionResponse | StreamingResponse:
+        self, request: PredictionRequest, timeline: dict | None = None
+    ) -> PredictionJSONResponse | PredictionResponse | StreamingResponse:
         logger.info("Starting the call to TorchServe client...")
         response = await self.torchserve_client.make_prediction(
-            request.prediction_model_name, request.image_path
+            request.prediction_model_name, self.open_image(request), timeline
         )
         return self.process_response(response, request.prediction_model_name)
 
-    async def store_response(self, inference_id: str, result) -> None:
-        logger.info(
-            f"Storing prediction results with inference_id: {inference_id} and result: {result}"
+    async def try_make_sync_prediction(
+        self, request: PredictionRequest
+    ) -> PredictionJSONResponse | PredictionResponse | StreamingResponse | None:
+        if self.sync_slots.locked():
+            logger.info("Synchronous inference slots are saturated.")
+            return None
+
+        async with self.sync_slots:
+            try:
+                return await asyncio.wait_for(
+                    self.make_prediction(request), settings.SYNC_DEADLINE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                logger.error("Synchronous prediction exceeded its deadline.")
+                raise ServerException(
+                    status_code=504,
+                    detail="Synchronous prediction exceeded its deadline.",
+                )
+
+    async def store_response(
+        self, inference_id: str, result, model_name: str, timeline: dict | None = None
+    ) -> None:
+        log_event(
+            "prediction.store",
+            "Storing prediction results with inference_id: {} and result: {}",
+            inference_id,
+            Payload(result),
+        )
+        await self.write_results(
+            [(inference_id, result)], model_name, [timeline or {}]
         )
-        stored_data = {}
+
+    async def store_responses(
+        self,
+        results: list[tuple[str, Any]],
+        model_name: str,
+        timelines: list[dict] | None = None,
+    ) -> None:
+        logger.info(f"Storing {len(results)} prediction results in one round trip")
+        await self.write_results(
+            results, model_name, timelines or [{} for _ in results]
+        )
+
+    async def write_results(
+        self, results: list[tuple[str, Any]], model_name: str, timelines: list[dict]
+    ) -> None:
+        """Store results of predictions that are still pending; results of
+        cancelled or expired ones are discarded."""
+        with STORE_RESPONSE_DURATION.time():
+            entries = []
+            for (inference_id, result), timeline in zip(results, timelines):
+                value, metadata = await self.serialize_response(inference_id, result)
+                entries.append((inference_id, value, {**timeline, **metadata}))
+            stored = await self.redis_client.finish_many_if_pending(
+                entries,
+                ttl=settings.RESULT_TTL_SECONDS,
+                notify_channel=settings.RESULT_NOTIFICATION_CHANNEL,
+            )
+        for (inference_id, _, _), done in zip(entries, stored):
+            if not done:
+                logger.info(
+                    f"Discarded the result for inference_id {inference_id}, "
+                    "it is no longer pending."
+                )
+        await self.record_completions(
+            model_name,
+            [metadata for (_, _, metadata), done in zip(entries, stored) if done],
+        )
+
+    async def record_completions(
+        self, model_name: str, metadatas: list[dict]
+    ) -> None:
+        if self.admission_controller:
+            await self.admission_controller.record_completed(
+                model_name, len(metadatas)
+            )
+        samples = []
+        for metadata in metadatas:
+            for stage, duration in stage_durations(metadata).items():
+                STAGE_DURATION.labels(stage).observe(duration)
+                samples.append((samples_key(stage), duration))
+        if samples:
+            await self.redis_client.push_samples(
+                samples, settings.TIMELINE_SAMPLE_SIZE
+            )
+
+    async def get_timeline(self, inference_id: str) -> PredictionTimeline:
+        metadata = await self.redis_client.get_metadata(inference_id)
+        if not metadata:
+            raise EntityNotFoundException(
+                f"No result found for inference_id {inference_id}"
+            )
+        return PredictionTimeline(
+            inference_id=inference_id,
+            prediction_model_name=metadata.get("prediction_model_name"),
+            status=metadata.get("status"),
+            timestamps=timestamps(metadata),
+            durations=stage_durations(metadata),
+        )
+
+    async def stage_stats(self) -> dict[str, StageStats]:
+        stages = list(STAGES)
+        samples = await self.redis_client.get_samples(
+            [samples_key(stage) for stage in stages]
+        )
+        stats = {}
+        for stage, values in zip(stages, samples):
+            if not values:
+                continue
+            values.sort()
+            stats[stage] = StageStats(
+                count=len(values),
+                p50=percentile(values, 0.5),
+                p90=percentile(values, 0.9),
+                p99=percentile(values, 0.99),
+                max=values[-1],
+            )
+        return stats
+
+    async def serialize_response(
+        self, inference_id: str, result
+    ) -> tuple[str | bytes, dict]:
+        if isinstance(result, PredictionJSONResponse):
+            if self.redis_client.codec.format == "json":
+                value, metadata = result.body, {"type": "json", "format": "json"}
+            else:
+                value, metadata = self.encode_record(result.data())
+            return value, {**metadata, "status": "completed", "stored_at": time.time()}
 
         if isinstance(result, PredictionResponse):
-            stored_data = {"type": "PredictionResponse", "content": result.dict()}
-        elif isinstance(result, StreamingResponse):
-            base64_content = await self.encode_streaming_response_to_base64(result)
-            stored_data = {
-                "type": "StreamingResponse",
-                "content": base64_content,
-                "content_type": result.media_type,
+            value, metadata = self.encode_record(result.dict())
+            return value, {**metadata, "status": "completed", "stored_at": time.time()}
+
+        if isinstance(result, StreamingResponse):
+            if isinstance(result, BinaryPredictionResponse):
+                body = result.content
+            else:
+                body = await self.read_streaming_body(result)
+            metadata = {
+                "status": "completed",
+                "type": "binary",
+                "content_type": result.media_type or "application/octet-stream",
+                "size": len(body),
+                "stored_at": time.time(),
             }
-        else:
-            logger.error(f"Unsupported result type for inference_id: {inference_id}")
+            if "content-disposition" in result.headers:
+                metadata["content_disposition"] = result.headers["content-disposition"]
+            return body, metadata
 
-        if stored_data:
-            self.redis_client.set(inference_id, json.dumps(stored_data))
-        else:
-            self.redis_client.set(inference_id, result)
+        logger.error(f"Unsupported result type for inference_id: {inference_id}")
+        return result, {
+            "status": "failed",
+            "type": "json",
+            "format": "json",
+            "stored_at": time.time(),
+        }
 
-    async def encode_streaming_response_to_base64(
-        self, streaming_response: StreamingResponse
-    ):
-        full_body_bytes = b""
+    def encode_record(self, record: dict) -> tuple[bytes, dict]:
+        codec = self.redis_client.codec
+        return codec.dumps(record), {"type": "json", "format": codec.format}
+
+    def pending_record(self, model_name: str) -> tuple[bytes, dict]:
+        return self.encode_record(
+            {"prediction_model_name": model_name, "results": "Pending"}
+        )
 
+    async def read_streaming_body(self, streaming_response: StreamingResponse) -> bytes:
+        chunks = []
         async for data in streaming_response.body_iterator:
             if isinstance(data, str):
                 data = data.encode("utf-8")
-            full_body_bytes += data
-
-        return base64.b64encode(full_body_bytes).decode("utf-8")
+            chunks.append(data)
+        return b"".join(chunks)
 
-    def get_response_from_inference_id(self, inference_id: str):
-        logger.info(f"Retrieving prediction results with inference_id: {inference_id}")
+    async def get_response_from_inference_id(self, inference_id: str):
+        log_event(
+            "prediction.get",
+            "Retrieving prediction results with inference_id: {}",
+            inference_id,
+        )
 
-        raw_result = self.redis_client.get(inference_id)
-        if not raw_result:
+        raw_result, metadata = await self.redis_client.get_with_metadata(inference_id)
+        if raw_result is None:
             raise EntityNotFoundException(
                 f"No result found for inference_id {inference_id}"
             )
+        return self.build_result(raw_result, metadata)
 
-        logger.info(f"Value {raw_result} of redis with key: {inference_id}")
+    def build_result(
+        self, raw_result: bytes | memoryview, metadata: dict
+    ) -> PredictionJSONResponse | PredictionResponse | StreamingResponse:
+        if metadata.get("type") == "binary":
+            logger.info(f"Raw result from redis is {len(raw_result)} binary bytes.")
+            return self.stream_binary_result(raw_result, metadata)
+        record_format = metadata.get("format")
+        if record_format == "json":
+            return PredictionJSONResponse(bytes(raw_result))
+        if record_format:
+            return PredictionJSONResponse(codec_for(record_format).loads(raw_result))
 
-        decoded_result = None
-        json_result = json.loads(raw_result)
-        if json_result:
-            logger.info("Raw result from redis is json.")
+        result_data = JSON_CODEC.loads(raw_result)
+        if result_data.get("type") == "PredictionResponse":
+            return PredictionResponse(**result_data["content"])
+        if result_data.get("type") == "StreamingResponse":
+            logger.info("Raw result from redis is a legacy base64 record.")
+            return self.stream_binary_result(
+                base64.b64decode(result_data["content"]),
+                {"content_type": result_data["content_type"]},
+            )
+        return PredictionResponse(**result_data)
 
-            if "type" in json_result and json_result["type"] == "PredictionResponse":
-                return PredictionResponse(**json_result["content"])
+    def stream_binary_result(
+        self, content: bytes | memoryview, metadata: dict
+    ) -> BinaryPredictionResponse:
+        headers = {}
+        if metadata.get("content_disposition"):
+            headers["Content-Disposition"] = metadata["content_disposition"]
+        return BinaryPredictionResponse(
+            content,
+            metadata.get("content_type", "application/octet-stream"),
+            settings.RESULT_STREAM_CHUNK_SIZE,
+            headers,
+        )
 
-            return PredictionResponse(**json.loads(raw_result))
+    async def is_pending(self, inference_id: str) -> bool:
+        metadata = await self.redis_client.get_metadata(inference_id)
+        return metadata.get("status") == "pending"
 
-        if isinstance(raw_result, bytes):
-            logger.info("Raw result from redis is byte array.")
-            decoded_result = raw_result.decode("utf-8")
+    async def is_cancelled(self, inference_id: str) -> bool:
+        metadata = await self.redis_client.get_metadata(inference_id)
+        return metadata.get("status") == "cancelled"
 
-        if decoded_result is None:
-            raise ServerException(
-                detail=f"Failed to decode result for inference_id {inference_id}"
+    async def finish_without_result(
+        self, inference_id: str, model_name: str, status: str, message: str
+    ) -> bool:
+        """Move a pending prediction to `status` with `message` as its result.
+
+        Returns False, leaving the prediction untouched, if it had already
+        finished.
+        """
+        value, metadata = self.encode_record(
+            {"prediction_model_name": model_name, "results": message}
+        )
+        metadata = {**metadata, "status": status, f"{status}_at": time.time()}
+        [finished] = await self.redis_client.finish_many_if_pending(
+            [(inference_id, value, metadata)],
+            ttl=settings.RESULT_TTL_SECONDS,
+            notify_channel=settings.RESULT_NOTIFICATION_CHANNEL,
+        )
+        return finished
+
+    async def cancel_prediction(self, inference_id: str) -> CancelPredictionResponse:
+        metadata = await self.redis_client.get_metadata(inference_id)
+        if not metadata:
+            raise EntityNotFoundException(
+                f"No result found for inference_id {inference_id}"
+            )
+        status = metadata.get("status")
+        if status == "pending":
+            logger.info(f"Cancelling prediction with inference_id: {inference_id}")
+            if await self.finish_without_result(
+                inference_id,
+                metadata.get("prediction_model_name", ""),
+                "cancelled",
+                "Cancelled",
+            ):
+                await self.redis_client.publish(
+                    settings.PREDICTION_CANCEL_CHANNEL, inference_id
+                )
+                return CancelPredictionResponse(
+                    inference_id=inference_id, status="cancelled"
+                )
+            status = (await self.redis_client.get_metadata(inference_id)).get("status")
+        if status != "cancelled":
+            raise ConflictException(
+                f"Prediction {inference_id} cannot be cancelled, it is {status}."
             )
+        return CancelPredictionResponse(inference_id=inference_id, status="cancelled")
 
-        result_data = json.loads(decoded_result)
+    async def ensure_exists(self, inference_id: str) -> None:
+        if not await self.redis_client.exists(inference_id):
+            raise EntityNotFoundException(
+                f"No result found for inference_id {inference_id}"
+            )
 
-        if result_data["type"] == "StreamingResponse":
-            content_type = result_data["content_type"]
-            data = result_data["data"].encode()
-            return StreamingResponse(content=data, media_type=content_type)
-        elif result_data["type"] == "PredictionResponse":
-            return PredictionResponse(**result_data["content"])
+    async def wait_for_response(self, inference_id: str, timeout: float):
+        if self.result_notifier is None or timeout <= 0:
+            return await self.get_response_from_inference_id(inference_id)
+
+        with self.result_notifier.waiter(inference_id) as completed:
+            if await self.is_pending(inference_id):
+                logger.info(f"Waiting up to {timeout}s for inference_id: {inference_id}")
+                try:
+                    await asyncio.wait_for(completed, timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+        return await self.get_response_from_inference_id(inference_id)
+
+    async def stream_result_events(
+        self, inference_id: str, result_url: str, timeout: float, heartbeat: float
+    ):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        with self.result_notifier.waiter(inference_id) as completed:
+            if await self.is_pending(inference_id):
+                yield self.format_event(
+                    "pending", {"inference_id": inference_id, "results": "Pending"}
+                )
+            else:
+                completed.cancel()
+
+            while not completed.done():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    yield self.format_event("timeout", {"inference_id": inference_id})
+                    return
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(completed), min(heartbeat, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+
+        result = await self.get_response_from_inference_id(inference_id)
+        if isinstance(result, PredictionJSONResponse):
+            try:
+                data = result.data()
+            except DecodeError as e:
+                yield self.format_event(
+                    "error", {"inference_id": inference_id, "error": str(e)}
+                )
+                return
+            yield self.format_event("result", data)
+        elif isinstance(result, PredictionResponse):
+            yield self.format_event("result", result.dict())
         else:
-            raise ServerException(detail="Unsupported response type")
+            yield self.format_event(
+                "result",
+                {
+                    "inference_id": inference_id,
+                    "content_type": result.media_type,
+                    "href": result_url,
+                },
+            )
+
+    @staticmethod
+    def format_event(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {JSON_CODEC.dumps(data).decode()}\n\n"
 
     async def publish_to_queue(self, request: PredictionRequest, inference_id: str):
         request_dict = request.dict()
-        await self.mq.publish(json.dumps(request_dict), inference_id)
-        logger.info(
-            f"Published to queue: {request_dict} with inference id {inference_id}"
+        await self.mq.publish(
+            request_dict,
+            inference_id,
+            routing_key=self.mq.queue_for(request.prediction_model_name),
+            priority=request.priority,
+            deadline_seconds=request.deadline_seconds,
+        )
+        log_event(
+            "prediction.publish",
+            "Published to queue: {} with inference id {}",
+            Payload(request_dict),
+            inference_id,
         )
 
     def process_response(
-        self, response, model_name
-    ) -> PredictionResponse | StreamingResponse:
-        logger.info(f"Processing the response {response} from model {model_name}")
+        self, response: httpx.Response | None, model_name: str
+    ) -> PredictionJSONResponse | PredictionResponse | StreamingResponse:
+        """Classify TorchServe's output by its Content-Type, sniffing a prefix
+        of the body only when the header does not settle it."""
+        log_event(
+            "prediction.process",
+            "Processing the response {} from model {}",
+            Payload(response.content if response else response),
+            model_name,
+        )
 
-        if response:
-            try:
-                response_text = response.content.decode("utf-8")
-                if response_text and (response_text.strip()[0] in "{["):
-                    return self.handle_json_response(response_text, model_name)
-            except UnicodeDecodeError:
-                return self.handle_binary_response(response.content, model_name)
+        content = response.content if response else b""
+        if content:
+            sniff_bytes = settings.RESPONSE_SNIFF_BYTES
+            declared = media_type(response.headers.get("content-type"))
+            if is_json_media_type(declared):
+                # Passed through unparsed; readers that decode stored results
+                # report a body that turns out to be invalid per result.
+                if looks_like_json(content, sniff_bytes):
+                    return self.handle_json_response(content, model_name)
+            elif declared not in GENERIC_MEDIA_TYPES:
+                return self.handle_binary_response(content, model_name, declared)
+
+            if looks_like_json(content, sniff_bytes):
+                try:
+                    JSON_CODEC.loads(content)
+                except ValueError:
+                    pass
+                else:
+                    return self.handle_json_response(content, model_name)
+            sniffed = magic.from_buffer(content[:sniff_bytes], mime=True)
+            if not sniffed.startswith("text/"):
+                return self.handle_binary_response(content, model_name, sniffed)
 
         return PredictionResponse(
             prediction_model_name=model_name, results="Unsupported response type"
         )
 
-    def handle_json_response(self, response_text, model_name) -> PredictionResponse:
-        response_data = json.loads(response_text)
-        logger.info(f"JSON Prediction output for model {model_name}: {response_data}")
-        return PredictionResponse(
-            prediction_model_name=model_name, results=response_data
+    def handle_json_response(
+        self, content: bytes, model_name: str
+    ) -> PredictionJSONResponse:
+        log_event(
+            "prediction.process",
+            "JSON Prediction output for model {}: {}",
+            model_name,
+            Payload(content),
         )
+        return PredictionJSONResponse.from_results(model_name, content)
 
-    def handle_binary_response(self, response_content, model_name) -> StreamingResponse:
-        logger.info("Handling binary response data.")
-        content_type = magic.from_buffer(response_content, mime=True)
+    def handle_binary_response(
+        self, content: bytes, model_name: str, content_type: str
+    ) -> BinaryPredictionResponse:
         file_extension = mimetypes.guess_extension(content_type) or ""
         logger.info(f"Binary content type: {content_type}")
-        return StreamingResponse(
-            iter([response_content]),
-            media_type=content_type,
-            headers={
+        return BinaryPredictionResponse(
+            content,
+            content_type,
+            settings.RESULT_STREAM_CHUNK_SIZE,
+            {
                 "Content-Disposition": f"attachment; filename={model_name}_output{file_extension}"
             },
         )
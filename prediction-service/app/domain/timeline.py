@@ -0,0 +1,43 @@
+import math
+
+SAMPLES_KEY_PREFIX = "timeline"
+
+TIMESTAMP_FIELDS = (
+    "published_at",
+    "dequeued_at",
+    "inference_started_at",
+    "inference_finished_at",
+    "stored_at",
+)
+
+STAGES = {
+    "queue_wait": ("published_at", "dequeued_at"),
+    "pre_inference": ("dequeued_at", "inference_started_at"),
+    "inference": ("inference_started_at", "inference_finished_at"),
+    "post_processing": ("inference_finished_at", "stored_at"),
+    "total": ("published_at", "stored_at"),
+}
+
+
+def timestamps(metadata: dict) -> dict[str, float]:
+    return {
+        field: float(metadata[field]) for field in TIMESTAMP_FIELDS if field in metadata
+    }
+
+
+def stage_durations(metadata: dict) -> dict[str, float]:
+    recorded = timestamps(metadata)
+    return {
+        stage: recorded[end] - recorded[start]
+        for stage, (start, end) in STAGES.items()
+        if start in recorded and end in recorded
+    }
+
+
+def samples_key(stage: str) -> str:
+    return f"{SAMPLES_KEY_PREFIX}:{stage}"
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    index = max(math.ceil(q * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
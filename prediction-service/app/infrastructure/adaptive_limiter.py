@@ -0,0 +1,227 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from loguru import logger
+from ..domain.exceptions.domain_exceptions import CapacityExceededException
+from .redis_client import RedisClient
+
+# Applies one cluster-wide adjustment to the shared limit. A decrease is
+# applied at most once per sync interval so that every process reacting to
+# the same overload does not compound the backoff.
+ADJUST_SHARED_LIMIT = """
+local limit = tonumber(redis.call('GET', KEYS[1]) or ARGV[6])
+if ARGV[2] == '1' then
+    if redis.call('SET', KEYS[2], 1, 'NX', 'PX', ARGV[7]) then
+        limit = limit * tonumber(ARGV[3])
+    end
+else
+    limit = limit + tonumber(ARGV[1])
+end
+limit = math.max(tonumber(ARGV[4]), math.min(tonumber(ARGV[5]), limit))
+redis.call('SET', KEYS[1], tostring(limit))
+return tostring(limit)
+"""
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit driven by call latency and overload responses.
+
+    The limit grows by one per window of successful calls while it is being
+    used, and shrinks multiplicatively when a call is rejected as overloaded
+    or its latency exceeds `latency_tolerance` times the no-load baseline.
+    Only calls started after the last decrease can trigger another one, so
+    a single spike seen by every call in flight backs off once.
+    Callers over the limit wait in FIFO order for up to `queue_timeout`.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float,
+        min_limit: float,
+        max_limit: float,
+        backoff_ratio: float,
+        latency_tolerance: float,
+        queue_timeout: float,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.baseline_latency: float | None = None
+        self._decreased_at = float("-inf")
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(int(self.limit), 1)
+
+    def _wake(self):
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._discard(waiter)
+                raise CapacityExceededException(
+                    "TorchServe is at capacity, please try again later."
+                )
+            except BaseException:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                else:
+                    self._discard(waiter)
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _discard(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def record(self, latency: float, overloaded: bool = False):
+        if not overloaded:
+            if self.baseline_latency is None or latency < self.baseline_latency:
+                self.baseline_latency = latency
+            else:
+                self.baseline_latency += (latency - self.baseline_latency) * 0.01
+            overloaded = latency > self.baseline_latency * self.latency_tolerance
+
+        if overloaded:
+            # `latency` is measured with perf_counter up to now, which dates
+            # the call's start.
+            now = time.perf_counter()
+            if now - latency > self._decreased_at:
+                self._decreased_at = now
+                self._set_limit(self.limit * self.backoff_ratio)
+        elif self.in_flight * 2 >= self.limit:
+            self._set_limit(self.limit + 1 / self.limit)
+
+    def _set_limit(self, limit: float):
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+        self._wake()
+
+
+class SharedAdaptiveLimiter(AdaptiveLimiter):
+    """Adaptive limiter whose limit is shared by all processes through Redis.
+
+    The limit stored in Redis is the total across processes. Every sync
+    interval each process pushes its accumulated increase, or a single
+    backoff, and takes an equal share of the shared limit based on the
+    number of live processes.
+    """
+
+    def __init__(
+        self,
+        redis_client: RedisClient,
+        key: str,
+        sync_interval: float,
+        initial_limit: float,
+        min_limit: float,
+        max_limit: float,
+        **kwargs,
+    ):
+        super().__init__(initial_limit, min_limit, max_limit, **kwargs)
+        self.redis_client = redis_client
+        self.key = key
+        self.members_key = f"{key}:members"
+        self.backoff_key = f"{key}:backoff"
+        self.sync_interval = sync_interval
+        self.initial_limit = initial_limit
+        self.member_id = uuid.uuid4().hex
+        self.shared_limit = float(initial_limit)
+        self.members = 1
+        self._pending_increase = 0.0
+        self._pending_backoff = False
+        self._adjust = redis_client.client.register_script(ADJUST_SHARED_LIMIT)
+        self._sync_task: asyncio.Task | None = None
+
+    async def start(self):
+        self._sync_task = asyncio.create_task(self._sync_loop())
+        logger.info(f"Sharing the TorchServe concurrency limit through {self.key}")
+
+    async def close(self):
+        if self._sync_task:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+        await self.redis_client.client.zrem(self.members_key, self.member_id)
+
+    def _set_limit(self, limit: float):
+        limit = max(1.0, min(self.max_limit, limit))
+        if limit < self.limit:
+            self._pending_backoff = True
+        else:
+            self._pending_increase += limit - self.limit
+        self.limit = limit
+        self._wake()
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to sync the shared TorchServe limit - {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    async def sync(self):
+        now = time.time()
+        increase, backoff = self._pending_increase, self._pending_backoff
+        self._pending_increase, self._pending_backoff = 0.0, False
+
+        async with self.redis_client.client.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.members_key, {self.member_id: now})
+            pipe.zremrangebyscore(self.members_key, "-inf", now - 3 * self.sync_interval)
+            pipe.zcard(self.members_key)
+            _, _, members = await pipe.execute()
+        shared_limit = await self._adjust(
+            keys=[self.key, self.backoff_key],
+            args=[
+                increase,
+                int(backoff),
+                self.backoff_ratio,
+                self.min_limit,
+                self.max_limit,
+                self.initial_limit,
+                int(self.sync_interval * 1000),
+            ],
+        )
+
+        self.members = max(members, 1)
+        self.shared_limit = float(shared_limit)
+        self.limit = max(self.shared_limit / self.members, 1.0)
+        self._wake()
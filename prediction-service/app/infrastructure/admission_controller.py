@@ -0,0 +1,134 @@
+import asyncio
+import math
+import time
+from loguru import logger
+from ..core.message_queue import AsyncMessageQueue
+from ..domain.exceptions.domain_exceptions import (
+    CapacityExceededException,
+    TooManyRequestsException,
+)
+from .redis_client import RedisClient
+
+COMPLETED_KEY_PREFIX = "admission:completed"
+
+
+class AdmissionController:
+    """Sheds new predictions when the queue backlog would miss the wait SLO.
+
+    The estimated wait is the depth of the request's queue divided by the
+    recent completion rate of that queue's workers. Queue depths and consumer
+    counts come from passive declares and completion rates from per-queue,
+    per-window counters in Redis, both cached for `refresh_interval` seconds
+    and adjusted locally for the requests admitted since.
+    """
+
+    def __init__(
+        self,
+        mq: AsyncMessageQueue,
+        redis_client: RedisClient,
+        max_wait: float,
+        model_max_waits: dict[str, float],
+        refresh_interval: float,
+        window_seconds: int,
+        windows: int,
+        max_retry_after: int,
+        no_consumer_retry_after: int,
+    ):
+        self.mq = mq
+        self.redis_client = redis_client
+        self.max_wait = max_wait
+        self.model_max_waits = model_max_waits
+        self.refresh_interval = refresh_interval
+        self.window_seconds = window_seconds
+        self.windows = windows
+        self.max_retry_after = max_retry_after
+        self.no_consumer_retry_after = no_consumer_retry_after
+        self.queue_depths: dict[str, int] = {}
+        self.consumers: dict[str, int] = {}
+        self.throughputs: dict[str, float] = {}
+        self._refreshed_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+
+    @staticmethod
+    def completed_key(queue_name: str, window: int) -> str:
+        return f"{COMPLETED_KEY_PREFIX}:{queue_name}:{window}"
+
+    def current_window(self) -> int:
+        return int(time.time() // self.window_seconds)
+
+    def max_wait_for(self, model_name: str) -> float:
+        return self.model_max_waits.get(model_name, self.max_wait)
+
+    async def record_completed(self, model_name: str, count: int):
+        await self.redis_client.increment_counter(
+            self.completed_key(self.mq.queue_for(model_name), self.current_window()),
+            count,
+            ttl=self.window_seconds * (self.windows + 1),
+        )
+
+    async def refresh(self):
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        async with self._refresh_lock:
+            if time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return
+            try:
+                names = self.mq.queue_names
+                statuses = await asyncio.gather(
+                    *(self.mq.queue_status(name) for name in names)
+                )
+                self.queue_depths = {
+                    name: depth for name, (depth, _) in zip(names, statuses)
+                }
+                self.consumers = {
+                    name: consumers for name, (_, consumers) in zip(names, statuses)
+                }
+                window = self.current_window()
+                windows = range(window - self.windows, window)
+                counts = await self.redis_client.get_counters(
+                    [self.completed_key(name, w) for name in names for w in windows]
+                )
+                span = self.windows * self.window_seconds
+                self.throughputs = {}
+                for i, name in enumerate(names):
+                    completed = sum(counts[i * self.windows : (i + 1) * self.windows])
+                    if completed:
+                        self.throughputs[name] = completed / span
+            except Exception as e:
+                logger.error(f"Failed to refresh admission control state - {e}")
+            self._refreshed_at = time.monotonic()
+
+    def estimated_wait(self, queue_name: str) -> float | None:
+        throughput = self.throughputs.get(queue_name)
+        if throughput is None:
+            return None
+        return self.queue_depths.get(queue_name, 0) / throughput
+
+    async def admit(self, model_name: str):
+        await self.refresh()
+        queue_name = self.mq.queue_for(model_name)
+        if (
+            self.consumers.get(queue_name) == 0
+            and self.queue_depths.get(queue_name, 0) > 0
+        ):
+            raise CapacityExceededException(
+                "No workers are consuming prediction requests.",
+                retry_after=self.no_consumer_retry_after,
+            )
+
+        estimated_wait = self.estimated_wait(queue_name)
+        max_wait = self.max_wait_for(model_name)
+        if estimated_wait is not None and estimated_wait > max_wait:
+            retry_after = min(
+                max(math.ceil(estimated_wait - max_wait), 1), self.max_retry_after
+            )
+            logger.warning(
+                f"Shedding prediction for model {model_name}: estimated wait "
+                f"{estimated_wait:.0f}s exceeds {max_wait:.0f}s"
+            )
+            raise TooManyRequestsException(
+                f"Estimated queue wait of {estimated_wait:.0f}s exceeds the "
+                f"{max_wait:.0f}s limit for model {model_name}.",
+                retry_after=retry_after,
+            )
+        self.queue_depths[queue_name] = self.queue_depths.get(queue_name, 0) + 1
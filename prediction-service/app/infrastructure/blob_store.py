@@ -0,0 +1,67 @@
+import asyncio
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, BinaryIO
+from loguru import logger
+from ..domain.exceptions.domain_exceptions import EntityNotFoundException
+
+
+class BlobStore(ABC):
+    @abstractmethod
+    async def put(self, source: BinaryIO) -> str:
+        ...
+
+    @abstractmethod
+    def open_stream(self, blob_key: str, chunk_size: int) -> AsyncIterator[bytes]:
+        ...
+
+    @abstractmethod
+    async def delete(self, blob_key: str) -> None:
+        ...
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, blob_key: str) -> str:
+        if os.path.basename(blob_key) != blob_key:
+            raise EntityNotFoundException(f"Blob {blob_key} not found.")
+        return os.path.join(self.root, blob_key)
+
+    async def put(self, source: BinaryIO) -> str:
+        blob_key = uuid.uuid4().hex
+        await asyncio.to_thread(self._write, source, self._path(blob_key))
+        logger.info(f"Stored blob {blob_key} in {self.root}")
+        return blob_key
+
+    @staticmethod
+    def _write(source: BinaryIO, path: str):
+        source.seek(0)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial_path = f"{path}.partial"
+        with open(partial_path, "wb") as f:
+            shutil.copyfileobj(source, f)
+        os.replace(partial_path, path)
+
+    async def open_stream(
+        self, blob_key: str, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        try:
+            f = await asyncio.to_thread(open, self._path(blob_key), "rb")
+        except FileNotFoundError:
+            raise EntityNotFoundException(f"Blob {blob_key} not found.")
+        try:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def delete(self, blob_key: str) -> None:
+        try:
+            await asyncio.to_thread(os.remove, self._path(blob_key))
+            logger.info(f"Deleted blob {blob_key} from {self.root}")
+        except FileNotFoundError:
+            logger.warning(f"Blob {blob_key} was already deleted")
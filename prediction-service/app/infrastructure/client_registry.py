@@ -0,0 +1,116 @@
+from loguru import logger
+from ..core.config import settings
+from ..core.message_queue import AsyncMessageQueue
+from ..domain.exceptions.domain_exceptions import MessagePublishException
+from ..schemas.pool import PoolStats
+from .adaptive_limiter import AdaptiveLimiter, SharedAdaptiveLimiter
+from .admission_controller import AdmissionController
+from .blob_store import LocalBlobStore
+from .compression import ValueCompressor
+from .prediction_cache import PredictionCache
+from .redis_client import RedisClient
+from .serialization import build_codec
+from .result_notifier import ResultNotifier
+from .torchserve_client import TorchServeClient
+
+
+class ClientRegistry:
+    def __init__(self):
+        self.mq = AsyncMessageQueue(
+            settings.RABBITMQ_CHANNEL_POOL_SIZE,
+            codec=build_codec(settings.MESSAGE_CODEC),
+        )
+        self.redis_client = RedisClient(
+            settings.REDIS_HOST,
+            settings.REDIS_PORT,
+            settings.REDIS_MAX_CONNECTIONS,
+            compressor=ValueCompressor(
+                settings.RESULT_COMPRESSION,
+                settings.RESULT_COMPRESSION_THRESHOLD_BYTES,
+                settings.RESULT_COMPRESSION_LEVEL,
+            ),
+            codec=build_codec(settings.RESULT_CODEC),
+        )
+        self.blob_store = LocalBlobStore(settings.BLOB_STORE_ROOT)
+        self.prediction_cache = PredictionCache(
+            self.redis_client,
+            settings.PREDICTION_CACHE_MODELS,
+            settings.MODEL_VERSIONS,
+            settings.RESULT_TTL_SECONDS,
+        )
+        self.admission_controller = (
+            AdmissionController(
+                self.mq,
+                self.redis_client,
+                settings.ADMISSION_MAX_WAIT_SECONDS,
+                settings.ADMISSION_MODEL_MAX_WAIT_SECONDS,
+                settings.ADMISSION_REFRESH_SECONDS,
+                settings.ADMISSION_THROUGHPUT_WINDOW_SECONDS,
+                settings.ADMISSION_THROUGHPUT_WINDOWS,
+                settings.ADMISSION_MAX_RETRY_AFTER_SECONDS,
+                settings.ADMISSION_NO_CONSUMER_RETRY_AFTER_SECONDS,
+            )
+            if settings.ADMISSION_CONTROL_ENABLED
+            else None
+        )
+        self.result_notifier = ResultNotifier(
+            self.redis_client, settings.RESULT_NOTIFICATION_CHANNEL
+        )
+        self.cancellation_notifier = ResultNotifier(
+            self.redis_client, settings.PREDICTION_CANCEL_CHANNEL
+        )
+        self.torchserve_client = TorchServeClient(
+            settings.TORCHSERVE_HOST,
+            max_connections=settings.TORCHSERVE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.TORCHSERVE_MAX_KEEPALIVE_CONNECTIONS,
+            limiter=self.build_torchserve_limiter(),
+            hosts=settings.TORCHSERVE_HOSTS,
+            transport=settings.TORCHSERVE_TRANSPORT,
+        )
+
+    def build_torchserve_limiter(self) -> AdaptiveLimiter:
+        options = dict(
+            backoff_ratio=settings.TORCHSERVE_LIMIT_BACKOFF_RATIO,
+            latency_tolerance=settings.TORCHSERVE_LIMIT_LATENCY_TOLERANCE,
+            queue_timeout=settings.TORCHSERVE_LIMIT_QUEUE_TIMEOUT_SECONDS,
+        )
+        if settings.TORCHSERVE_LIMIT_SHARED:
+            return SharedAdaptiveLimiter(
+                self.redis_client,
+                "torchserve:limit",
+                settings.TORCHSERVE_LIMIT_SYNC_SECONDS,
+                settings.TORCHSERVE_LIMIT_INITIAL,
+                settings.TORCHSERVE_LIMIT_MIN,
+                settings.TORCHSERVE_LIMIT_MAX,
+                **options,
+            )
+        return AdaptiveLimiter(
+            settings.TORCHSERVE_LIMIT_INITIAL,
+            settings.TORCHSERVE_LIMIT_MIN,
+            settings.TORCHSERVE_LIMIT_MAX,
+            **options,
+        )
+
+    async def start(self):
+        try:
+            await self.mq.ensure_open()
+        except MessagePublishException:
+            logger.warning("RabbitMQ is unavailable, connecting on first publish.")
+        await self.redis_client.connect()
+        await self.torchserve_client.start()
+        logger.info("Infrastructure clients started.")
+
+    async def close(self):
+        await self.result_notifier.close()
+        await self.cancellation_notifier.close()
+        await self.mq.disconnect()
+        await self.torchserve_client.close()
+        await self.redis_client.close()
+        logger.info("Infrastructure clients closed.")
+
+    def pool_stats(self) -> dict[str, PoolStats]:
+        return {
+            "rabbitmq_channels": self.mq.pool_stats(),
+            "redis": self.redis_client.pool_stats(),
+            "torchserve": self.torchserve_client.pool_stats(),
+        }
@@ -0,0 +1,66 @@
+import zlib
+from loguru import logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RAW = 0x00
+ZLIB = 0x01
+ZSTD = 0x02
+
+SAMPLE_SIZE = 64 * 1024
+MIN_SAVING_RATIO = 0.9
+
+
+class ValueCompressor:
+    def __init__(self, algorithm: str = "zlib", threshold: int = 4096, level: int = 3):
+        if algorithm == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, falling back to zlib.")
+            algorithm = "zlib"
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self.level = level
+        if algorithm == "zstd":
+            self._zstd_compressor = zstandard.ZstdCompressor(level=level)
+
+    def _compress(self, data: bytes) -> tuple[int, bytes]:
+        if self.algorithm == "zstd":
+            return ZSTD, self._zstd_compressor.compress(data)
+        return ZLIB, zlib.compress(data, self.level)
+
+    def _worth_compressing(self, data: bytes) -> bool:
+        if len(data) <= SAMPLE_SIZE:
+            return True
+        sample = data[:SAMPLE_SIZE]
+        return len(self._compress(sample)[1]) < len(sample) * MIN_SAVING_RATIO
+
+    def encode(self, value: str | bytes) -> tuple[bytes, bytes]:
+        # The header and the payload are returned apart and written to Redis
+        # as separate arguments, so large raw values are never copied to
+        # prepend the header.
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        if (
+            self.algorithm != "none"
+            and len(value) >= self.threshold
+            and self._worth_compressing(value)
+        ):
+            header, compressed = self._compress(value)
+            if len(compressed) < len(value) * MIN_SAVING_RATIO:
+                return bytes([header]), compressed
+        return bytes([RAW]), value
+
+    @staticmethod
+    def decode(data: bytes) -> bytes | memoryview:
+        header = data[0] if data else None
+        if header == RAW:
+            return memoryview(data)[1:]
+        if header == ZLIB:
+            return zlib.decompress(memoryview(data)[1:])
+        if header == ZSTD:
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read this value.")
+            return zstandard.ZstdDecompressor().decompress(memoryview(data)[1:])
+        return data
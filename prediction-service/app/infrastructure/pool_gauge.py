@@ -0,0 +1,33 @@
+import asyncio
+from contextlib import asynccontextmanager
+from ..schemas.pool import PoolStats
+
+
+class PoolGauge:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.in_use = 0
+        self.waiters = 0
+        self._semaphore = asyncio.Semaphore(max_size)
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.waiters += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiters -= 1
+        self.in_use += 1
+        try:
+            yield
+        finally:
+            self.in_use -= 1
+            self._semaphore.release()
+
+    def stats(self, open_connections: int) -> PoolStats:
+        return PoolStats(
+            max_size=self.max_size,
+            in_use=self.in_use,
+            idle=max(open_connections - self.in_use, 0),
+            waiters=self.waiters,
+        )
@@ -0,0 +1,75 @@
+import hashlib
+from collections import defaultdict
+from loguru import logger
+from ..schemas.monitoring import CacheStats
+from .redis_client import RedisClient
+
+STALE_STATUSES = (None, "failed", "cancelled", "expired")
+
+
+class PredictionCache:
+    key_prefix = "prediction_cache"
+    stats_key = "prediction_cache:stats"
+
+    def __init__(
+        self,
+        redis_client: RedisClient,
+        enabled_models: list[str],
+        model_versions: dict[str, str],
+        ttl: int,
+    ):
+        self.redis_client = redis_client
+        self.enabled_models = set(enabled_models)
+        self.model_versions = model_versions
+        self.ttl = ttl
+
+    def is_enabled(self, model_name: str) -> bool:
+        return model_name in self.enabled_models
+
+    def model_version(self, model_name: str) -> str:
+        return self.model_versions.get(model_name, "default")
+
+    def key_for(self, model_name: str, image_digest: str) -> str:
+        digest = hashlib.sha256(
+            f"{model_name}\0{self.model_version(model_name)}\0{image_digest}".encode()
+        )
+        return f"{self.key_prefix}:{digest.hexdigest()}"
+
+    async def claim(
+        self, cache_key: str, model_name: str, inference_id: str
+    ) -> str | None:
+        existing_id = await self.redis_client.set_if_absent(
+            cache_key, inference_id, self.ttl
+        )
+        if existing_id is not None:
+            metadata = await self.redis_client.get_metadata(existing_id)
+            status = metadata.get("status")
+            if status not in STALE_STATUSES:
+                outcome = "hits" if status == "completed" else "coalesced"
+                logger.info(
+                    f"Prediction cache {outcome} for model {model_name}: {existing_id}"
+                )
+                await self.record(model_name, outcome)
+                return existing_id
+
+            await self.redis_client.delete(cache_key)
+            existing_id = await self.redis_client.set_if_absent(
+                cache_key, inference_id, self.ttl
+            )
+            if existing_id is not None:
+                await self.record(model_name, "coalesced")
+                return existing_id
+
+        await self.record(model_name, "misses")
+        return None
+
+    async def record(self, model_name: str, outcome: str):
+        await self.redis_client.increment(self.stats_key, f"{model_name}:{outcome}")
+
+    async def stats(self) -> dict[str, CacheStats]:
+        counters = await self.redis_client.get_hash(self.stats_key)
+        stats: dict[str, CacheStats] = defaultdict(CacheStats)
+        for field, value in counters.items():
+            model_name, _, outcome = field.rpartition(":")
+            setattr(stats[model_name], outcome, int(value))
+        return dict(stats)
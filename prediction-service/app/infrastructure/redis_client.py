@@ -1,47 +1,374 @@
 from loguru import logger
-import redis
+import redis.asyncio as redis
+from collections import defaultdict
+from ..core.log_events import Payload, log_event
+from ..schemas.monitoring import ModelMemoryUsage, RedisMemoryReport
+from ..schemas.pool import PoolStats
+from .compression import ValueCompressor
+from .pool_gauge import PoolGauge
+from .serialization import JSON_CODEC, JsonCodec, MsgpackCodec
+
+# Stores a prediction's final value and metadata only while its status is
+# still pending, so a cancellation and a stored result never overwrite each
+# other whichever lands first. A prediction without metadata, queued before
+# statuses were recorded or whose pending marker expired, counts as pending.
+# The value arrives as its compression header and payload.
+FINISH_IF_PENDING = """
+local status = redis.call('HGET', KEYS[2], 'status')
+if status and status ~= 'pending' then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+redis.call('APPEND', KEYS[1], ARGV[2])
+redis.call('HSET', KEYS[2], unpack(ARGV, 5))
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+if ARGV[4] ~= '' then
+    redis.call('PUBLISH', ARGV[4], KEYS[1])
+end
+return 1
+"""
 
 class RedisClient:
-    def __init__(self, host: str, port: int):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        max_connections: int = 50,
+        compressor: ValueCompressor | None = None,
+        codec: JsonCodec | MsgpackCodec = JSON_CODEC,
+    ):
         self.host = host
         self.port = port
-        self.connect()
+        self.compressor = compressor or ValueCompressor(algorithm="none")
+        self.codec = codec
+        self.pool = redis.BlockingConnectionPool(
+            host=host,
+            port=port,
+            max_connections=max_connections,
+            decode_responses=False,
+        )
+        self.client = redis.Redis(connection_pool=self.pool)
+        self._gauge = PoolGauge(max_connections)
+        self._finish_if_pending = self.client.register_script(FINISH_IF_PENDING)
+
+    @staticmethod
+    def metadata_key(key: str) -> str:
+        return f"{key}:meta"
 
-    def connect(self):
+    async def connect(self):
         try:
-            self.client = redis.Redis(host=self.host, port=self.port, decode_responses=True)
-            if self.client.ping():
+            if await self.client.ping():
                 logger.info(f"Connected to Redis at {self.host}:{self.port}")
         except redis.ConnectionError as e:
             logger.error(f"Failed to connect to Redis at {self.host}:{self.port} - {e}")
 
-    def set(self, key: str, value: str):
+    async def close(self):
+        await self.client.aclose()
+        await self.pool.disconnect()
+        logger.info(f"Closed Redis connection pool for {self.host}:{self.port}")
+
+    def pool_stats(self) -> PoolStats:
+        open_connections = len(getattr(self.pool, "_in_use_connections", ())) + len(
+            getattr(self.pool, "_available_connections", ())
+        )
+        return self._gauge.stats(open_connections)
+
+    async def set(self, key: str, value: str | bytes, ttl: int | None = None):
         try:
-            self.client.set(key, value)
-            logger.info(f"Set key: {key} with value: {value} in Redis")
+            header, payload = self.compressor.encode(value)
+            async with self._gauge.acquire():
+                async with self.client.pipeline(transaction=True) as pipe:
+                    pipe.set(key, header, ex=ttl)
+                    pipe.append(key, payload)
+                    await pipe.execute()
+            log_event(
+                "redis.set", "Set key: {} with value: {} in Redis", key, Payload(value)
+            )
         except Exception as e:
             logger.error(f"Error setting key: {key} in Redis - {e}")
 
-    def get(self, key: str):
+    async def set_with_metadata(
+        self,
+        key: str,
+        value: str | bytes,
+        metadata: dict,
+        notify_channel: str | None = None,
+        ttl: int | None = None,
+    ):
+        await self.set_many_with_metadata(
+            [(key, value, metadata)], notify_channel, ttl
+        )
+
+    async def set_many_with_metadata(
+        self,
+        entries: list[tuple[str, str | bytes, dict]],
+        notify_channel: str | None = None,
+        ttl: int | None = None,
+    ):
+        try:
+            encoded = [
+                (key, self.compressor.encode(value), metadata)
+                for key, value, metadata in entries
+            ]
+            # A transaction, so readers never see a value holding only its header.
+            async with self._gauge.acquire():
+                async with self.client.pipeline(transaction=True) as pipe:
+                    for key, (header, payload), metadata in encoded:
+                        pipe.set(key, header, ex=ttl)
+                        pipe.append(key, payload)
+                        pipe.hset(
+                            self.metadata_key(key),
+                            mapping={
+                                **metadata,
+                                "stored_size": len(header) + len(payload),
+                            },
+                        )
+                        if ttl:
+                            pipe.expire(self.metadata_key(key), ttl)
+                        if notify_channel:
+                            pipe.publish(notify_channel, key)
+                    await pipe.execute()
+            logger.info(f"Set {len(entries)} keys with metadata in Redis")
+        except Exception as e:
+            logger.error(f"Error setting {len(entries)} keys with metadata in Redis - {e}")
+            raise
+
+    async def finish_many_if_pending(
+        self,
+        entries: list[tuple[str, str | bytes, dict]],
+        ttl: int,
+        notify_channel: str | None = None,
+    ) -> list[bool]:
+        """Store each entry only if its metadata still says it is pending.
+
+        Returns whether each entry was stored. Redis errors are raised rather
+        than logged, so that callers can retry or reject the work whose
+        results were lost.
+        """
+        async with self._gauge.acquire():
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value, metadata in entries:
+                    header, payload = self.compressor.encode(value)
+                    fields = {**metadata, "stored_size": len(header) + len(payload)}
+                    await self._finish_if_pending(
+                        keys=[key, self.metadata_key(key)],
+                        args=[
+                            header,
+                            payload,
+                            ttl,
+                            notify_channel or "",
+                            *(item for field in fields.items() for item in field),
+                        ],
+                        client=pipe,
+                    )
+                stored = await pipe.execute()
+        logger.info(f"Finished {sum(stored)} of {len(entries)} pending keys in Redis")
+        return [bool(done) for done in stored]
+
+    async def get(self, key: str):
         try:
-            value = self.client.get(key)
+            async with self._gauge.acquire():
+                value = await self.client.get(key)
             if value is not None:
-                logger.info(f"Retrieved key: {key} with value: {value} from Redis")
-            else:
-                logger.warning(f"Key: {key} does not exist in Redis")
-            return value
+                log_event(
+                    "redis.get",
+                    "Retrieved key: {} with value: {} from Redis",
+                    key,
+                    Payload(value),
+                )
+                return self.compressor.decode(value)
+            logger.warning(f"Key: {key} does not exist in Redis")
+            return None
         except Exception as e:
             logger.error(f"Error retrieving key: {key} from Redis - {e}")
             return None
 
-    def exists(self, key: str):
+    @staticmethod
+    def decode_metadata(metadata: dict) -> dict:
+        return {k.decode(): v.decode() for k, v in metadata.items()}
+
+    async def get_metadata(self, key: str) -> dict:
+        try:
+            async with self._gauge.acquire():
+                metadata = await self.client.hgetall(self.metadata_key(key))
+            return self.decode_metadata(metadata)
+        except Exception as e:
+            logger.error(f"Error retrieving metadata for key: {key} from Redis - {e}")
+            return {}
+
+    async def get_with_metadata(
+        self, key: str
+    ) -> tuple[bytes | memoryview | None, dict]:
+        try:
+            async with self._gauge.acquire():
+                async with self.client.pipeline(transaction=False) as pipe:
+                    pipe.get(key)
+                    pipe.hgetall(self.metadata_key(key))
+                    value, metadata = await pipe.execute()
+            if value is None:
+                logger.warning(f"Key: {key} does not exist in Redis")
+                return None, self.decode_metadata(metadata)
+            return self.compressor.decode(value), self.decode_metadata(metadata)
+        except Exception as e:
+            logger.error(f"Error retrieving key: {key} with metadata from Redis - {e}")
+            return None, {}
+
+    async def get_many_with_metadata(
+        self, keys: list[str]
+    ) -> list[tuple[bytes | memoryview | None, dict]]:
+        try:
+            async with self._gauge.acquire():
+                async with self.client.pipeline(transaction=False) as pipe:
+                    pipe.mget(keys)
+                    for key in keys:
+                        pipe.hgetall(self.metadata_key(key))
+                    values, *metadata = await pipe.execute()
+            return [
+                (
+                    self.compressor.decode(value) if value is not None else None,
+                    self.decode_metadata(meta),
+                )
+                for value, meta in zip(values, metadata)
+            ]
+        except Exception as e:
+            logger.error(f"Error retrieving {len(keys)} keys from Redis - {e}")
+            return [(None, {}) for _ in keys]
+
+    async def set_if_absent(self, key: str, value: str, ttl: int | None = None):
+        try:
+            async with self._gauge.acquire():
+                previous = await self.client.set(key, value, nx=True, get=True, ex=ttl)
+            return previous.decode() if previous is not None else None
+        except Exception as e:
+            logger.error(f"Error setting key: {key} if absent in Redis - {e}")
+            return None
+
+    async def delete(self, *keys: str):
+        try:
+            async with self._gauge.acquire():
+                await self.client.delete(*keys)
+        except Exception as e:
+            logger.error(f"Error deleting keys: {keys} from Redis - {e}")
+
+    async def increment(self, key: str, field: str, amount: int = 1):
+        try:
+            async with self._gauge.acquire():
+                await self.client.hincrby(key, field, amount)
+        except Exception as e:
+            logger.error(f"Error incrementing {field} of key: {key} in Redis - {e}")
+
+    async def get_hash(self, key: str) -> dict:
         try:
-            exists = self.client.exists(key)
+            async with self._gauge.acquire():
+                return self.decode_metadata(await self.client.hgetall(key))
+        except Exception as e:
+            logger.error(f"Error retrieving hash: {key} from Redis - {e}")
+            return {}
+
+    async def push_samples(self, samples: list[tuple[str, float]], max_len: int):
+        try:
+            async with self._gauge.acquire():
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for key, value in samples:
+                        pipe.lpush(key, value)
+                    for key in {key for key, _ in samples}:
+                        pipe.ltrim(key, 0, max_len - 1)
+                    await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error pushing {len(samples)} samples to Redis - {e}")
+
+    async def get_samples(self, keys: list[str]) -> list[list[float]]:
+        try:
+            async with self._gauge.acquire():
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.lrange(key, 0, -1)
+                    replies = await pipe.execute()
+            return [[float(value) for value in reply] for reply in replies]
+        except Exception as e:
+            logger.error(f"Error retrieving samples for {keys} from Redis - {e}")
+            return [[] for _ in keys]
+
+    async def increment_counter(self, key: str, amount: int, ttl: int):
+        try:
+            async with self._gauge.acquire():
+                async with self.client.pipeline(transaction=False) as pipe:
+                    pipe.incrby(key, amount)
+                    pipe.expire(key, ttl)
+                    await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error incrementing counter: {key} in Redis - {e}")
+
+    async def get_counters(self, keys: list[str]) -> list[int]:
+        async with self._gauge.acquire():
+            values = await self.client.mget(keys)
+        return [int(value) if value is not None else 0 for value in values]
+
+    async def publish(self, channel: str, message: str):
+        try:
+            async with self._gauge.acquire():
+                await self.client.publish(channel, message)
+        except Exception as e:
+            logger.error(f"Error publishing to channel: {channel} in Redis - {e}")
+
+    async def exists(self, key: str):
+        try:
+            async with self._gauge.acquire():
+                exists = await self.client.exists(key)
             if exists:
-                logger.info(f"Key: {key} exists in Redis")
+                log_event("redis.exists", "Key: {} exists in Redis", key)
             else:
                 logger.warning(f"Key: {key} does not exist in Redis")
             return exists
         except Exception as e:
             logger.error(f"Error checking if key: {key} exists in Redis - {e}")
             return False
+
+    async def memory_report(self, scan_count: int = 500) -> RedisMemoryReport:
+        models: dict[str, ModelMemoryUsage] = defaultdict(ModelMemoryUsage)
+        async with self._gauge.acquire():
+            info = await self.client.info("memory")
+            batch = []
+            async for meta_key in self.client.scan_iter(
+                match=self.metadata_key("*"), count=scan_count
+            ):
+                batch.append(meta_key)
+                if len(batch) >= scan_count:
+                    await self._add_memory_usage(batch, models)
+                    batch = []
+            if batch:
+                await self._add_memory_usage(batch, models)
+
+        return RedisMemoryReport(
+            used_memory=info.get("used_memory", 0),
+            maxmemory=info.get("maxmemory", 0),
+            models=dict(models),
+        )
+
+    async def _add_memory_usage(
+        self, meta_keys: list[bytes], models: dict[str, ModelMemoryUsage]
+    ):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for meta_key in meta_keys:
+                pipe.hmget(meta_key, "prediction_model_name", "status", "stored_size")
+                pipe.memory_usage(meta_key)
+                pipe.memory_usage(meta_key[: -len(b":meta")])
+            replies = await pipe.execute(raise_on_error=False)
+
+        for i in range(0, len(replies), 3):
+            fields, meta_bytes, value_bytes = replies[i : i + 3]
+            if isinstance(fields, Exception):
+                continue
+            model_name, status, stored_size = (
+                f.decode() if f else None for f in fields
+            )
+            usage = models[model_name or "unknown"]
+            usage.keys += 1
+            if isinstance(value_bytes, int):
+                usage.bytes += value_bytes
+            elif stored_size:
+                usage.bytes += int(stored_size)
+            if isinstance(meta_bytes, int):
+                usage.bytes += meta_bytes
+            status = status or "unknown"
+            usage.by_status[status] = usage.by_status.get(status, 0) + 1
@@ -0,0 +1,57 @@
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+from loguru import logger
+from .redis_client import RedisClient
+
+
+class ResultNotifier:
+    def __init__(self, redis_client: RedisClient, channel: str):
+        self.redis_client = redis_client
+        self.channel = channel
+        self._waiters: dict[str, set[asyncio.Future]] = defaultdict(set)
+        self._listener: asyncio.Task | None = None
+
+    async def start(self):
+        self._listener = asyncio.create_task(self._listen())
+        logger.info(f"Listening for result notifications on {self.channel}")
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self):
+        while True:
+            pubsub = self.redis_client.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._notify(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Result notification listener failed - {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def _notify(self, inference_id: str):
+        for future in self._waiters.pop(inference_id, ()):
+            if not future.done():
+                future.set_result(None)
+
+    @contextmanager
+    def waiter(self, inference_id: str):
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[inference_id].add(future)
+        try:
+            yield future
+        finally:
+            waiters = self._waiters.get(inference_id)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._waiters[inference_id]
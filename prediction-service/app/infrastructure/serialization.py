@@ -0,0 +1,90 @@
+import json
+from typing import Any
+from loguru import logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class DecodeError(ValueError):
+    pass
+
+
+class JsonCodec:
+    name = "json"
+    format = "json"
+    content_type = "application/json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value).encode()
+
+    def loads(self, data: bytes | memoryview) -> Any:
+        try:
+            return json.loads(bytes(data))
+        except ValueError as e:
+            raise DecodeError(str(e)) from e
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, data: bytes | memoryview) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            raise DecodeError(str(e)) from e
+
+
+class MsgpackCodec:
+    name = "msgpack"
+    format = "msgpack"
+    content_type = "application/msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value)
+
+    def loads(self, data: bytes | memoryview) -> Any:
+        try:
+            return msgpack.unpackb(data)
+        except ValueError as e:
+            raise DecodeError(str(e)) from e
+
+
+# The fastest installed codec that writes JSON, for values that must be JSON.
+JSON_CODEC = OrjsonCodec() if orjson is not None else JsonCodec()
+
+
+def build_codec(name: str) -> JsonCodec | MsgpackCodec:
+    if name == "msgpack" and msgpack is None:
+        logger.warning("msgpack is not installed, falling back to JSON.")
+        name = "orjson"
+    if name == "orjson" and orjson is None:
+        logger.warning("orjson is not installed, falling back to json.")
+        name = "json"
+
+    if name == "msgpack":
+        return MsgpackCodec()
+    if name == "orjson":
+        return OrjsonCodec()
+    return JsonCodec()
+
+
+def codec_for(format: str | None) -> JsonCodec | MsgpackCodec:
+    """Return a codec that reads values written in `format`, given as a codec
+    format or content type. Anything else, including values written before
+    formats were recorded, is read as JSON."""
+    if format in (MsgpackCodec.format, MsgpackCodec.content_type):
+        if msgpack is None:
+            raise RuntimeError("msgpack is required to read this value.")
+        return MsgpackCodec()
+    return JSON_CODEC
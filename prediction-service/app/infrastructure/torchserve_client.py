@@ -1,34 +1,97 @@
 import asyncio
+import time
+from typing import AsyncIterator
 import httpx
 from loguru import logger
-from aiolimiter import AsyncLimiter
 from ..domain.exceptions.domain_exceptions import (
+    CapacityExceededException,
     EntityNotFoundException,
     ServerException,
 )
 from ..core.config import settings
+from ..core.metrics import (
+    TORCHSERVE_CONCURRENCY_LIMIT,
+    TORCHSERVE_DURATION,
+    TORCHSERVE_RATE_LIMITED,
+    model_label,
+)
+from ..schemas.monitoring import TorchServeEndpointStats
+from ..schemas.pool import PoolStats
+from .adaptive_limiter import AdaptiveLimiter
+from .pool_gauge import PoolGauge
+from .torchserve_pool import EndpointPool
+from .torchserve_transport import GrpcTransport, HttpTransport, build_transport
 
 
-class TorchServeClient:
-    rate_limiter = AsyncLimiter(
-        settings.RATE_LIMITER_MAX_TOKENS, settings.RATE_LIMITER_REFILL_TIME
-    )
+OVERLOAD_STATUSES = ("429", "503", "timeout")
+ENDPOINT_FAILURES = ("timeout", "unreachable")
+
 
-    def __init__(self, host: str):
+class TorchServeClient:
+    def __init__(
+        self,
+        host: str,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        limiter: AdaptiveLimiter | None = None,
+        hosts: list[str] | None = None,
+        transport: str = "http1",
+    ):
         self.host = host
-        self._client = httpx.AsyncClient(base_url=self.host, timeout=30.0)
+        self.endpoints = EndpointPool(
+            hosts or [host],
+            settings.TORCHSERVE_BREAKER_FAILURE_THRESHOLD,
+            settings.TORCHSERVE_BREAKER_RESET_SECONDS,
+            settings.TORCHSERVE_HEALTH_CHECK_SECONDS,
+        )
+        self.limiter = limiter or AdaptiveLimiter(
+            settings.TORCHSERVE_LIMIT_INITIAL,
+            settings.TORCHSERVE_LIMIT_MIN,
+            settings.TORCHSERVE_LIMIT_MAX,
+            backoff_ratio=settings.TORCHSERVE_LIMIT_BACKOFF_RATIO,
+            latency_tolerance=settings.TORCHSERVE_LIMIT_LATENCY_TOLERANCE,
+            queue_timeout=settings.TORCHSERVE_LIMIT_QUEUE_TIMEOUT_SECONDS,
+        )
+        self.transport: HttpTransport | GrpcTransport = build_transport(
+            transport,
+            max_connections,
+            max_keepalive_connections,
+            settings.TORCHSERVE_KEEPALIVE_EXPIRY_SECONDS,
+            settings.TORCHSERVE_CONNECT_TIMEOUT_SECONDS,
+            settings.PREDICTION_TIMEOUT,
+            settings.TORCHSERVE_GRPC_MAX_MESSAGE_BYTES,
+        )
+        self._gauge = PoolGauge(max_connections)
+
+    async def start(self):
+        await self.limiter.start()
+        await self.endpoints.start(self.transport)
 
     async def close(self):
-        await self._client.aclose()
+        await self.endpoints.close()
+        await self.limiter.close()
+        await self.transport.close()
+        logger.info(f"Closed TorchServe client for {self.host}")
 
-    @staticmethod
-    async def read_image_data(image_path: str) -> bytes:
-        return await asyncio.to_thread(TorchServeClient._read_image_file, image_path)
+    def pool_stats(self) -> PoolStats:
+        return self._gauge.stats(self.transport.open_connections())
+
+    def endpoint_stats(self) -> list[TorchServeEndpointStats]:
+        return self.endpoints.stats()
 
     @staticmethod
-    def _read_image_file(image_path: str) -> bytes:
-        with open(image_path, "rb") as f:
-            return f.read()
+    async def iter_image_file(
+        image_path: str, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        try:
+            f = await asyncio.to_thread(open, image_path, "rb")
+        except FileNotFoundError:
+            raise EntityNotFoundException(f"Image {image_path} not found.")
+        try:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
 
     async def _handle_http_exception(self, e: httpx.HTTPStatusError):
         if e.response.status_code == 404:
@@ -39,40 +102,88 @@ class TorchServeClient:
             raise ServerException(status_code=e.response.status_code, detail=str(e))
 
     async def make_prediction(
-        self, prediction_model: str, image_path: str
+        self,
+        prediction_model: str,
+        image: str | AsyncIterator[bytes],
+        timeline: dict | None = None,
     ) -> httpx.Response:
-        response = None
+        model = model_label(prediction_model)
         try:
-            await asyncio.wait_for(self.rate_limiter.acquire(), timeout=1.0)
-        except asyncio.TimeoutError as e:
-            logger.error("Rate limit exceeded. Please try again later.")
-            raise ServerException(detail=str(e))
+            async with self.limiter.acquire():
+                return await self._post_prediction(
+                    prediction_model, image, model, timeline
+                )
+        except CapacityExceededException:
+            TORCHSERVE_RATE_LIMITED.labels(model).inc()
+            logger.error("TorchServe concurrency limit queue timed out.")
+            raise
 
+    async def _post_prediction(
+        self,
+        prediction_model: str,
+        image: str | AsyncIterator[bytes],
+        model: str,
+        timeline: dict | None,
+    ) -> httpx.Response:
+        response = None
         logger.info(f"Prediction start for model {prediction_model}.")
 
-        image_data = await self.read_image_data(image_path)
+        if isinstance(image, str):
+            image = self.iter_image_file(image, settings.UPLOAD_CHUNK_SIZE)
+
+        endpoint = self.endpoints.choose(prediction_model)
 
         async def prediction_task():
-            return await self._client.post(
-                f"predictions/{prediction_model}",
-                content=image_data,
-                headers={"Content-Type": "application/octet-stream"},
-            )
+            async with self._gauge.acquire():
+                return await self.transport.predict(
+                    endpoint.host, prediction_model, image
+                )
 
+        start_time = time.perf_counter()
+        status = "error"
+        if timeline is not None:
+            timeline["inference_started_at"] = time.time()
         try:
-            response = await asyncio.wait_for(
-                prediction_task(), timeout=settings.PREDICTION_TIMEOUT
-            )
+            with self.endpoints.track(endpoint, prediction_model):
+                response = await asyncio.wait_for(
+                    prediction_task(), timeout=settings.PREDICTION_TIMEOUT
+                )
+            status = str(response.status_code)
             response.raise_for_status()
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
         except asyncio.TimeoutError:
+            status = "timeout"
             logger.error("Prediction request timed out.")
             raise ServerException(
                 status_code=504,
                 detail="Prediction request timed out, please try again later.",
             )
-        except (httpx.HTTPStatusError, httpx.RequestError) as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error occurred while making a prediction: {str(e)}")
             await self._handle_http_exception(e)
+        except httpx.RequestError as e:
+            status = "unreachable"
+            logger.error(f"Failed to reach TorchServe: {str(e)}")
+            raise ServerException(
+                status_code=502, detail=f"Failed to reach TorchServe: {str(e)}"
+            )
+        finally:
+            elapsed = time.perf_counter() - start_time
+            TORCHSERVE_DURATION.labels(model, status).observe(elapsed)
+            # Only TorchServe's own answers count as successes: errors raised
+            # before a response, such as a missing upload, say nothing about
+            # the endpoint's health.
+            if status in ENDPOINT_FAILURES or status[0] == "5":
+                self.endpoints.record(endpoint, failed=True)
+            elif status.isdigit():
+                self.endpoints.record(endpoint, failed=False)
+            if status in OVERLOAD_STATUSES or status.startswith("2"):
+                self.limiter.record(elapsed, overloaded=status in OVERLOAD_STATUSES)
+                TORCHSERVE_CONCURRENCY_LIMIT.set(self.limiter.limit)
+            if timeline is not None:
+                timeline["inference_finished_at"] = time.time()
 
         logger.info(f"Prediction made successfully for model {prediction_model}.")
         return response
@@ -0,0 +1,171 @@
+import asyncio
+import itertools
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from loguru import logger
+from ..core.metrics import TORCHSERVE_ENDPOINT_AVAILABLE
+from ..domain.exceptions.domain_exceptions import ServerException
+from ..schemas.monitoring import TorchServeEndpointStats
+from .torchserve_transport import GrpcTransport, HttpTransport
+
+
+class CircuitBreaker:
+    """Ejects an endpoint after `failure_threshold` consecutive failures.
+
+    Once `reset_timeout` seconds have passed, a single trial call (or a
+    successful health check) is let through. Its success closes the breaker
+    and its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._trial_in_flight)
+
+    def before_call(self):
+        if self.state == "half_open":
+            self._trial_in_flight = True
+
+    def after_call(self):
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class TorchServeEndpoint:
+    def __init__(self, host: str, breaker: CircuitBreaker):
+        self.host = (host if "://" in host else f"http://{host}").rstrip("/")
+        self.breaker = breaker
+        self.outstanding: dict[str, int] = defaultdict(int)
+
+    @property
+    def total_outstanding(self) -> int:
+        return sum(self.outstanding.values())
+
+    def stats(self) -> TorchServeEndpointStats:
+        return TorchServeEndpointStats(
+            host=self.host,
+            state=self.breaker.state,
+            consecutive_failures=self.breaker.failures,
+            outstanding={
+                model: count for model, count in self.outstanding.items() if count
+            },
+        )
+
+
+class EndpointPool:
+    """Routes each call to the available endpoint with the fewest outstanding
+    requests for the model, rotating between endpoints that are tied.
+
+    Endpoints are probed with TorchServe's `/ping` every `health_check_interval`
+    seconds; failed probes and failed calls both count towards the breaker.
+    """
+
+    def __init__(
+        self,
+        hosts: list[str],
+        failure_threshold: int,
+        reset_timeout: float,
+        health_check_interval: float,
+    ):
+        self.endpoints = [
+            TorchServeEndpoint(host, CircuitBreaker(failure_threshold, reset_timeout))
+            for host in hosts
+        ]
+        self.health_check_interval = health_check_interval
+        self._rotation = itertools.count()
+        self._health_task: asyncio.Task | None = None
+
+    async def start(self, transport: HttpTransport | GrpcTransport):
+        if len(self.endpoints) > 1:
+            self._health_task = asyncio.create_task(self._health_loop(transport))
+        logger.info(f"Routing TorchServe calls across {len(self.endpoints)} endpoints")
+
+    async def close(self):
+        if self._health_task:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+
+    def choose(self, model: str) -> TorchServeEndpoint:
+        available = [
+            endpoint for endpoint in self.endpoints if endpoint.breaker.allow()
+        ]
+        if not available:
+            raise ServerException(
+                status_code=503, detail="No healthy TorchServe endpoint is available."
+            )
+        start = next(self._rotation) % len(available)
+        rotated = available[start:] + available[:start]
+        return min(
+            rotated,
+            key=lambda endpoint: (
+                endpoint.outstanding[model],
+                endpoint.total_outstanding,
+            ),
+        )
+
+    @contextmanager
+    def track(self, endpoint: TorchServeEndpoint, model: str):
+        endpoint.breaker.before_call()
+        endpoint.outstanding[model] += 1
+        try:
+            yield
+        finally:
+            endpoint.outstanding[model] -= 1
+            endpoint.breaker.after_call()
+
+    def record(self, endpoint: TorchServeEndpoint, failed: bool):
+        if failed:
+            endpoint.breaker.record_failure()
+            if endpoint.breaker.state == "open":
+                logger.warning(f"Ejected TorchServe endpoint {endpoint.host}")
+        else:
+            endpoint.breaker.record_success()
+        TORCHSERVE_ENDPOINT_AVAILABLE.labels(endpoint.host).set(
+            int(endpoint.breaker.state != "open")
+        )
+
+    async def ping(
+        self, transport: HttpTransport | GrpcTransport, endpoint: TorchServeEndpoint
+    ):
+        if not await transport.ping(endpoint.host):
+            logger.warning(f"TorchServe endpoint {endpoint.host} failed a health check")
+            self.record(endpoint, failed=True)
+        elif endpoint.breaker.state == "half_open":
+            logger.info(f"TorchServe endpoint {endpoint.host} is healthy again")
+            self.record(endpoint, failed=False)
+
+    async def _health_loop(self, transport: HttpTransport | GrpcTransport):
+        while True:
+            await asyncio.gather(
+                *(self.ping(transport, endpoint) for endpoint in self.endpoints)
+            )
+            await asyncio.sleep(self.health_check_interval)
+
+    def stats(self) -> list[TorchServeEndpointStats]:
+        return [endpoint.stats() for endpoint in self.endpoints]
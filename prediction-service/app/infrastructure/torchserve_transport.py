@@ -0,0 +1,203 @@
+from typing import AsyncIterator
+from urllib.parse import urlsplit
+import httpx
+from loguru import logger
+from ..domain.exceptions.domain_exceptions import PayloadTooLargeException
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+GRPC_SERVICE = "/org.pytorch.serve.grpc.inference.InferenceAPIsService"
+
+# HTTP statuses reported for gRPC failures, so that the client's status
+# handling, the adaptive limiter and the circuit breaker treat both
+# transports alike.
+GRPC_HTTP_STATUSES = {
+    "INVALID_ARGUMENT": 400,
+    "NOT_FOUND": 404,
+    "RESOURCE_EXHAUSTED": 429,
+    "UNIMPLEMENTED": 501,
+    "UNAVAILABLE": 503,
+    "DEADLINE_EXCEEDED": 504,
+}
+
+
+class HttpTransport:
+    """Calls TorchServe's REST inference API over HTTP/1.1 or HTTP/2.
+
+    With HTTP/2 every endpoint is reached over a single multiplexed
+    connection, negotiated through ALPN for https endpoints and with prior
+    knowledge for plain http ones.
+    """
+
+    def __init__(
+        self,
+        http2: bool,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        connect_timeout: float,
+        timeout: float,
+    ):
+        self._transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            http1=not http2,
+            http2=http2,
+        )
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            transport=self._transport,
+        )
+
+    async def predict(
+        self, host: str, model: str, image: AsyncIterator[bytes]
+    ) -> httpx.Response:
+        return await self.client.post(
+            f"{host}/predictions/{model}",
+            content=image,
+            headers={"Content-Type": "application/octet-stream"},
+        )
+
+    async def ping(self, host: str) -> bool:
+        try:
+            response = await self.client.get(f"{host}/ping", timeout=5.0)
+        except httpx.HTTPError:
+            return False
+        return response.status_code == 200
+
+    def open_connections(self) -> int:
+        pool = getattr(self._transport, "_pool", None)
+        return len(getattr(pool, "connections", ()))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class GrpcTransport:
+    """Calls TorchServe's gRPC inference API over one channel per endpoint.
+
+    Endpoint hosts point at the gRPC inference port (7070 by default). The
+    image is sent as the `data` input of a single Predictions call, since
+    TorchServe takes each request as one message, so the whole image is
+    buffered in memory first. Images larger than `max_message_bytes` are
+    refused once that many bytes have been read, rather than buffered for a
+    call gRPC would reject anyway.
+
+    grpcio and the generated stubs are imported here rather than with the
+    module, since the stubs need protobuf 7.35.1 or later and otherwise fail
+    to import with an error that is not an ImportError.
+    """
+
+    def __init__(self, max_message_bytes: int):
+        import grpc
+        from google.protobuf import empty_pb2
+        from .proto import inference_pb2
+
+        self.grpc = grpc
+        self.max_message_bytes = max_message_bytes
+        self.empty_pb2 = empty_pb2
+        self.inference_pb2 = inference_pb2
+        self.options = [
+            ("grpc.max_send_message_length", max_message_bytes),
+            ("grpc.max_receive_message_length", max_message_bytes),
+        ]
+        self._stubs: dict[str, tuple] = {}
+
+    def _stub(self, host: str) -> tuple:
+        stub = self._stubs.get(host)
+        if stub is None:
+            target = urlsplit(host).netloc or host
+            channel = self.grpc.aio.insecure_channel(target, options=self.options)
+            messages = self.inference_pb2
+            predictions = channel.unary_unary(
+                f"{GRPC_SERVICE}/Predictions",
+                request_serializer=messages.PredictionsRequest.SerializeToString,
+                response_deserializer=messages.PredictionResponse.FromString,
+            )
+            ping = channel.unary_unary(
+                f"{GRPC_SERVICE}/Ping",
+                request_serializer=self.empty_pb2.Empty.SerializeToString,
+                response_deserializer=messages.TorchServeHealthResponse.FromString,
+            )
+            stub = self._stubs[host] = (channel, predictions, ping)
+        return stub
+
+    async def predict(
+        self, host: str, model: str, image: AsyncIterator[bytes]
+    ) -> httpx.Response:
+        _, predictions, _ = self._stub(host)
+        request = httpx.Request("POST", f"{host}/predictions/{model}")
+        chunks, size = [], 0
+        async for chunk in image:
+            size += len(chunk)
+            if size > self.max_message_bytes:
+                raise PayloadTooLargeException(
+                    f"Images sent over gRPC are limited to "
+                    f"{self.max_message_bytes} bytes."
+                )
+            chunks.append(chunk)
+        data = b"".join(chunks)
+        try:
+            response = await predictions(
+                self.inference_pb2.PredictionsRequest(
+                    model_name=model, input={"data": data}
+                )
+            )
+        except self.grpc.aio.AioRpcError as e:
+            return httpx.Response(
+                GRPC_HTTP_STATUSES.get(e.code().name, 500),
+                text=e.details() or e.code().name,
+                request=request,
+            )
+        return httpx.Response(200, content=response.prediction, request=request)
+
+    async def ping(self, host: str) -> bool:
+        _, _, ping = self._stub(host)
+        try:
+            response = await ping(self.empty_pb2.Empty(), timeout=5.0)
+        except self.grpc.aio.AioRpcError:
+            return False
+        return "Healthy" in response.health
+
+    def open_connections(self) -> int:
+        return len(self._stubs)
+
+    async def close(self):
+        for channel, _, _ in self._stubs.values():
+            await channel.close()
+        self._stubs.clear()
+
+
+def build_transport(
+    name: str,
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry: float,
+    connect_timeout: float,
+    timeout: float,
+    grpc_max_message_bytes: int,
+) -> HttpTransport | GrpcTransport:
+    if name == "grpc":
+        try:
+            return GrpcTransport(grpc_max_message_bytes)
+        except Exception as e:
+            logger.warning(f"gRPC is unavailable ({e}), falling back to HTTP/1.1.")
+            name = "http1"
+    if name == "http2" and h2 is None:
+        logger.warning("h2 is not installed, falling back to HTTP/1.1.")
+        name = "http1"
+
+    return HttpTransport(
+        name == "http2",
+        max_connections,
+        max_keepalive_connections,
+        keepalive_expiry,
+        connect_timeout,
+        timeout,
+    )
@@ -1,16 +1,23 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from loguru import logger
 from .core.exception_setup import setup_exception_handlers
 from .middleware.middleware_setup import setup_middlewares
 from .api.router_setup import router as api_router
 from .core.logger_config import setup_logging
 from .core.config import app_configs
+from .infrastructure.client_registry import ClientRegistry
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logging()
+    app.state.clients = ClientRegistry()
+    await app.state.clients.start()
+    await app.state.clients.result_notifier.start()
     yield
+    await app.state.clients.close()
+    await logger.complete()
 
 
 def create_application() -> FastAPI:
@@ -1,21 +1,41 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.domain.exceptions.domain_exceptions import CustomBaseException
 
 
-class ExceptionHandlingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class ExceptionHandlingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_wrapper)
         except CustomBaseException as exc:
-            return JSONResponse(
+            if response_started:
+                raise
+            response = JSONResponse(
                 status_code=exc.status_code,
                 content={"detail": exc.detail, "status_code": exc.status_code},
+                headers=exc.headers,
             )
-        except Exception as exc:
-            return JSONResponse(
+            await response(scope, receive, send)
+        except Exception:
+            if response_started:
+                raise
+            response = JSONResponse(
                 status_code=500,
                 content={"detail": "Internal Server Error", "status_code": 500},
             )
+            await response(scope, receive, send)
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .exception_handling import ExceptionHandlingMiddleware
+from .metrics import MetricsMiddleware
 from .request_logging import RequestLoggingMiddleware
 from ..core.config import settings
 
@@ -16,3 +17,4 @@ def setup_middlewares(app: FastAPI):
     )
     app.add_middleware(ExceptionHandlingMiddleware)
     app.add_middleware(RequestLoggingMiddleware)
+    app.add_middleware(MetricsMiddleware)
@@ -1,20 +1,36 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
-from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..core.log_events import log_event
 import time
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        response: Response = await call_next(request)
-        process_time = (time.time() - start_time) * 1000
-        formatted_process_time = "{0:.2f}".format(process_time)
+class RequestLoggingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        logger.info(
-            f"request path={request.url.path}, request method={request.method}, "
-            f"response status code={response.status_code}, request process time={formatted_process_time}ms"
-        )
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        return response
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            process_time = (time.perf_counter() - start_time) * 1000
+            log_event(
+                "http.request",
+                "request path={}, request method={}, response status code={}, "
+                "request process time={:.2f}ms",
+                scope["path"],
+                scope["method"],
+                status_code,
+                process_time,
+            )
@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+
+
+class ModelMemoryUsage(BaseModel):
+    keys: int = 0
+    bytes: int = 0
+    by_status: dict[str, int] = {}
+
+
+class RedisMemoryReport(BaseModel):
+    used_memory: int
+    maxmemory: int
+    models: dict[str, ModelMemoryUsage]
+
+
+class StageStats(BaseModel):
+    count: int
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+
+
+class TorchServeEndpointStats(BaseModel):
+    host: str
+    state: str
+    consecutive_failures: int
+    outstanding: dict[str, int] = {}
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class PoolStats(BaseModel):
+    max_size: int
+    in_use: int
+    idle: int
+    waiters: int
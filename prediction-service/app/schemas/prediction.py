@@ -1,16 +1,75 @@
-from pydantic import BaseModel
-from typing import Any, List
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List
 
 
 class PredictionRequest(BaseModel):
     prediction_model_name: str
     image_path: str
+    priority: int = Field(default=0, ge=0, le=255)
+    deadline_seconds: float | None = Field(default=None, gt=0)
+
+
+class QueuedPredictionRequest(PredictionRequest):
+    """A prediction request as the workers receive it.
+
+    An uploaded image is referenced by `blob_key` instead of `image_path`.
+    Only the service sets it, and the blob is deleted once the prediction is
+    done, so it is never read from a client's request body.
+    """
+
+    image_path: str | None = None
+    blob_key: str | None = None
+
+    @model_validator(mode="after")
+    def check_image_source(self):
+        if (self.image_path is None) == (self.blob_key is None):
+            raise ValueError("Exactly one of 'image_path' or 'blob_key' is required.")
+        return self
 
 
 class PendingPredictionResponse(BaseModel):
     inference_id: str
 
 
+class CancelPredictionResponse(BaseModel):
+    inference_id: str
+    status: str
+
+
 class PredictionResponse(BaseModel):
     prediction_model_name: str
     results: List[Any] | str
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    inference_id: str | None = None
+    error: str | None = None
+
+
+class BatchPredictionResponse(BaseModel):
+    items: List[BatchItemResult]
+
+
+class BulkResultsRequest(BaseModel):
+    inference_ids: List[str]
+
+
+class BulkResultItem(BaseModel):
+    inference_id: str
+    result: Any = None
+    content_type: str | None = None
+    size: int | None = None
+    error: str | None = None
+
+
+class BulkResultsResponse(BaseModel):
+    items: List[BulkResultItem]
+
+
+class PredictionTimeline(BaseModel):
+    inference_id: str
+    prediction_model_name: str | None = None
+    status: str | None = None
+    timestamps: Dict[str, float] = {}
+    durations: Dict[str, float] = {}
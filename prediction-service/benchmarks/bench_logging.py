@@ -0,0 +1,92 @@
+"""Measure the per-request logging overhead of the hot paths before and after
+lazy payload summaries, sampling and the background JSON sink.
+
+Run from the prediction-service directory:
+
+    python -m benchmarks.bench_logging
+"""
+import json
+import os
+import time
+from loguru import logger
+from app.core.config import settings
+from app.core.log_events import JsonSink, Payload, log_event
+
+REQUESTS = 200
+RESULT_SIZES = (("1KB", 1024), ("1MB", 2**20), ("8MB", 8 * 2**20))
+FORMAT = (
+    "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+)
+
+
+def eager_request(inference_id: str, body: str, result: str):
+    logger.info(f"Publishing message with inference_id {inference_id}. Message: {body}")
+    logger.info(f"Processing the response {result} from model densenet161")
+    logger.info(f"Set key: {inference_id} with value: {result} in Redis")
+    logger.info(f"Retrieved key: {inference_id} with value: {result} from Redis")
+
+
+def lazy_request(inference_id: str, body: str, result: str):
+    log_event(
+        "mq.publish",
+        "Publishing message with inference_id {}. Message: {}",
+        inference_id,
+        Payload(body),
+    )
+    log_event(
+        "prediction.process",
+        "Processing the response {} from model {}",
+        Payload(result),
+        "densenet161",
+    )
+    log_event(
+        "redis.set",
+        "Set key: {} with value: {} in Redis",
+        inference_id,
+        Payload(result),
+    )
+    log_event(
+        "redis.get",
+        "Retrieved key: {} with value: {} from Redis",
+        inference_id,
+        Payload(result),
+    )
+
+
+def measure(run, result: str) -> float:
+    body = json.dumps(
+        {"prediction_model_name": "densenet161", "image_path": "/tmp/a.jpg"}
+    )
+    start = time.perf_counter()
+    for i in range(REQUESTS):
+        run(str(i), body, result)
+    logger.complete()
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+def main():
+    devnull = open(os.devnull, "w")
+    sample_rates = {"redis.set": 0.01, "redis.get": 0.01, "prediction.process": 0.01}
+    modes = (
+        ("eager f-strings", eager_request, {}, "text"),
+        ("lazy summaries", lazy_request, {}, "text"),
+        ("lazy + sampled", lazy_request, sample_rates, "text"),
+        ("lazy + json sink", lazy_request, sample_rates, "json"),
+    )
+
+    print(f"{'result':>6} {'mode':>17} {'us/request':>11}")
+    for size_name, size in RESULT_SIZES:
+        result = json.dumps({"predictions": "x" * size})
+        for name, run, rates, log_format in modes:
+            logger.remove()
+            if log_format == "json":
+                logger.add(JsonSink(devnull), enqueue=True, format="{message}")
+            else:
+                logger.add(devnull, format=FORMAT)
+            settings.LOG_SAMPLE_RATES = rates
+            print(f"{size_name:>6} {name:>17} {measure(run, result):>11.1f}")
+    logger.remove()
+
+
+if __name__ == "__main__":
+    main()
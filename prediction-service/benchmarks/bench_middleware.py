@@ -0,0 +1,152 @@
+"""Compare throughput and latency of GET /predictions/{inference_id} through the
+previous BaseHTTPMiddleware stack and the pure ASGI middlewares.
+
+Needs a running Redis reachable at REDIS_HOST/REDIS_PORT. Run from the
+prediction-service directory:
+
+    python -m benchmarks.bench_middleware
+"""
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+import httpx
+from fastapi import FastAPI, Request
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from app.api.router_setup import router as api_router
+from app.core.exception_setup import setup_exception_handlers
+from app.domain.exceptions.domain_exceptions import CustomBaseException
+from app.infrastructure.client_registry import ClientRegistry
+from app.middleware.exception_handling import ExceptionHandlingMiddleware
+from app.middleware.request_logging import RequestLoggingMiddleware
+
+REQUESTS = 2000
+CONCURRENCY = 50
+BINARY_SIZE = 4 * 2**20
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = (time.time() - start_time) * 1000
+        logger.info(
+            f"request path={request.url.path}, request method={request.method}, "
+            f"response status code={response.status_code}, "
+            f"request process time={process_time:.2f}ms"
+        )
+        return response
+
+
+class LegacyExceptionHandlingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        try:
+            return await call_next(request)
+        except CustomBaseException as exc:
+            return JSONResponse(
+                status_code=exc.status_code,
+                content={"detail": exc.detail, "status_code": exc.status_code},
+            )
+        except Exception:
+            return JSONResponse(
+                status_code=500,
+                content={"detail": "Internal Server Error", "status_code": 500},
+            )
+
+
+def build_app(clients: ClientRegistry, exception_middleware, logging_middleware):
+    application = FastAPI()
+    application.add_middleware(exception_middleware)
+    application.add_middleware(logging_middleware)
+    setup_exception_handlers(application)
+    application.include_router(api_router)
+    application.state.clients = clients
+    return application
+
+
+async def seed(clients: ClientRegistry) -> dict[str, str]:
+    json_id, binary_id = str(uuid.uuid4()), str(uuid.uuid4())
+    await clients.redis_client.set_with_metadata(
+        json_id,
+        json.dumps({"prediction_model_name": "densenet161", "results": [0.1] * 100}),
+        {"prediction_model_name": "densenet161", "status": "completed"},
+        ttl=600,
+    )
+    await clients.redis_client.set_with_metadata(
+        binary_id,
+        os.urandom(BINARY_SIZE),
+        {
+            "prediction_model_name": "densenet161",
+            "status": "completed",
+            "type": "binary",
+            "content_type": "image/png",
+            "size": BINARY_SIZE,
+            "content_disposition": "attachment; filename=densenet161_output.png",
+        },
+        ttl=600,
+    )
+    return {"json": json_id, "4MB binary": binary_id}
+
+
+async def run(application: FastAPI, inference_id: str, requests: int):
+    latencies = []
+    remaining = iter(range(requests))
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def client_loop():
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await client.get(f"/predictions/{inference_id}")
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return (
+        requests / elapsed,
+        statistics.median(latencies),
+        latencies[int(len(latencies) * 0.99) - 1],
+    )
+
+
+async def main():
+    logger.remove()
+    clients = ClientRegistry()
+    await clients.redis_client.connect()
+    ids = await seed(clients)
+    stacks = (
+        (
+            "BaseHTTPMiddleware",
+            LegacyExceptionHandlingMiddleware,
+            LegacyRequestLoggingMiddleware,
+        ),
+        ("pure ASGI", ExceptionHandlingMiddleware, RequestLoggingMiddleware),
+    )
+
+    print(f"{'result':>11} {'stack':>19} {'req/s':>8} {'p50 ms':>7} {'p99 ms':>7}")
+    for result_name, inference_id in ids.items():
+        requests = REQUESTS if result_name == "json" else REQUESTS // 10
+        for stack_name, exception_middleware, logging_middleware in stacks:
+            application = build_app(clients, exception_middleware, logging_middleware)
+            throughput, p50, p99 = await run(application, inference_id, requests)
+            print(
+                f"{result_name:>11} {stack_name:>19} "
+                f"{throughput:>8.0f} {p50:>7.2f} {p99:>7.2f}"
+            )
+
+    await clients.redis_client.delete(
+        *ids.values(), *(clients.redis_client.metadata_key(i) for i in ids.values())
+    )
+    await clients.redis_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
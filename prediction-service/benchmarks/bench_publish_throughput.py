@@ -0,0 +1,97 @@
+"""Compare publish throughput of the previous publish paths with the confirming publisher.
+
+Needs a running RabbitMQ broker reachable at RABBITMQ_URL. Run from the
+prediction-service directory:
+
+    python -m benchmarks.bench_publish_throughput
+"""
+import asyncio
+import time
+import uuid
+from aio_pika import connect_robust
+from aio_pika.pool import Pool
+from app.core.config import settings
+from app.core.message_queue import AsyncMessageQueue
+from app.core.publisher import ConfirmingPublisher
+
+MESSAGES = 5000
+CONCURRENCY = 200
+BODY = {"prediction_model_name": "densenet161", "image_path": "/tmp/a.jpg"}
+MQ = AsyncMessageQueue()
+
+
+async def sequential(connection, queue_name: str):
+    channel = await connection.channel()
+    for _ in range(MESSAGES):
+        inference_id = str(uuid.uuid4())
+        await channel.default_exchange.publish(
+            MQ.build_message(BODY, inference_id), routing_key=queue_name
+        )
+    await channel.close()
+
+
+async def exclusive_pool(connection, queue_name: str):
+    pool = Pool(connection.channel, max_size=settings.RABBITMQ_CHANNEL_POOL_SIZE)
+
+    async def publish_one():
+        async with pool.acquire() as channel:
+            await channel.default_exchange.publish(
+                MQ.build_message(BODY, str(uuid.uuid4())),
+                routing_key=queue_name,
+            )
+
+    await run_concurrently(publish_one)
+    await pool.close()
+
+
+async def pipelined(connection, queue_name: str):
+    publisher = ConfirmingPublisher(
+        settings.RABBITMQ_CHANNEL_POOL_SIZE,
+        settings.RABBITMQ_PUBLISH_MAX_OUTSTANDING,
+        settings.RABBITMQ_PUBLISH_CONFIRM_TIMEOUT_SECONDS,
+    )
+    await publisher.start(connection)
+
+    async def publish_one():
+        await publisher.publish(
+            MQ.build_message(BODY, str(uuid.uuid4())), queue_name
+        )
+
+    await run_concurrently(publish_one)
+    await publisher.close()
+
+
+async def run_concurrently(publish_one):
+    remaining = iter(range(MESSAGES))
+
+    async def publisher_loop():
+        for _ in remaining:
+            await publish_one()
+
+    await asyncio.gather(*(publisher_loop() for _ in range(CONCURRENCY)))
+
+
+async def main():
+    connection = await connect_robust(settings.RABBITMQ_HOST)
+    queue_name = f"bench_publish_{uuid.uuid4().hex[:8]}"
+    async with connection.channel() as channel:
+        queue = await channel.declare_queue(queue_name, durable=True)
+
+        print(f"{'path':>15} {'messages':>9} {'seconds':>8} {'msg/s':>9}")
+        for name, run in (
+            ("sequential", sequential),
+            ("exclusive pool", exclusive_pool),
+            ("pipelined", pipelined),
+        ):
+            start = time.perf_counter()
+            await run(connection, queue_name)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>15} {MESSAGES:>9} {elapsed:>8.2f} {MESSAGES / elapsed:>9.0f}")
+            await queue.purge()
+
+        await queue.delete(if_unused=False, if_empty=False)
+    await connection.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+"""Measure per-stage CPU time and peak memory of turning large TorchServe
+outputs into stored and served results, comparing the previous
+decode-everything pipeline with Content-Type-driven processing and raw JSON
+passthrough.
+
+Needs nothing running. Run from the prediction-service directory:
+
+    python -m benchmarks.bench_response_processing
+"""
+import asyncio
+import json
+import mimetypes
+import os
+import time
+import tracemalloc
+import httpx
+import magic
+from fastapi.responses import JSONResponse, StreamingResponse
+from loguru import logger
+from app.domain.prediction_service import PredictionService
+from app.infrastructure.redis_client import RedisClient
+from app.schemas.prediction import PredictionResponse
+
+DETECTIONS = (10_000, 100_000)
+BINARY_SIZES_MB = (4, 16)
+MODEL = "densenet161"
+
+
+class LegacyPredictionService(PredictionService):
+    def process_response(self, response, model_name):
+        if response:
+            try:
+                response_text = response.content.decode("utf-8")
+                if response_text and (response_text.strip()[0] in "{["):
+                    return self.handle_json_response(response_text, model_name)
+            except UnicodeDecodeError:
+                return self.handle_binary_response(response.content, model_name)
+        return PredictionResponse(
+            prediction_model_name=model_name, results="Unsupported response type"
+        )
+
+    def handle_json_response(self, response_text, model_name):
+        return PredictionResponse(
+            prediction_model_name=model_name, results=json.loads(response_text)
+        )
+
+    def handle_binary_response(self, response_content, model_name):
+        content_type = magic.from_buffer(response_content, mime=True)
+        file_extension = mimetypes.guess_extension(content_type) or ""
+        return StreamingResponse(
+            iter([response_content]),
+            media_type=content_type,
+            headers={
+                "Content-Disposition": f"attachment; filename={model_name}_output{file_extension}"
+            },
+        )
+
+    async def serialize_response(self, inference_id, result):
+        if isinstance(result, PredictionResponse):
+            stored_data = {"type": "PredictionResponse", "content": result.dict()}
+            return json.dumps(stored_data), {"status": "completed", "type": "json"}
+        return await super().serialize_response(inference_id, result)
+
+
+async def serve(result) -> int:
+    if isinstance(result, PredictionResponse):
+        return len(JSONResponse(result.model_dump(mode="json")).body)
+    if isinstance(result, StreamingResponse):
+        sent = 0
+        async for chunk in result.body_iterator:
+            sent += len(chunk)
+        return sent
+    return len(result.body)
+
+
+async def measure(coroutine):
+    start = time.process_time()
+    result = await coroutine
+    return result, (time.process_time() - start) * 1000
+
+
+async def run_stages(service: PredictionService, response: httpx.Response):
+    async def process():
+        return service.process_response(response, MODEL)
+
+    async def store():
+        value, metadata = await service.serialize_response("benchmark", result)
+        return (value.encode() if isinstance(value, str) else value), metadata
+
+    async def read():
+        return service.build_result(stored, metadata)
+
+    result, process_ms = await measure(process())
+    (stored, metadata), store_ms = await measure(store())
+    result, read_ms = await measure(read())
+    _, serve_ms = await measure(serve(result))
+    return process_ms, store_ms, read_ms, serve_ms
+
+
+async def peak_memory(service: PredictionService, response: httpx.Response) -> float:
+    tracemalloc.start()
+    await run_stages(service, response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def payloads():
+    for count in DETECTIONS:
+        detections = [
+            {"label": f"class_{i % 1000}", "score": 0.5, "box": [1.0, 2.0, 3.0, 4.0]}
+            for i in range(count)
+        ]
+        yield f"{count // 1000}k JSON", httpx.Response(
+            200,
+            content=json.dumps(detections).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+    for size_mb in BINARY_SIZES_MB:
+        yield f"{size_mb}MB PNG", httpx.Response(
+            200,
+            content=b"\x89PNG\r\n\x1a\n" + os.urandom(size_mb * 2**20),
+            headers={"Content-Type": "image/png"},
+        )
+
+
+async def main():
+    logger.remove()
+    services = (
+        ("legacy", LegacyPredictionService(None, None, None)),
+        ("current", PredictionService(None, None, RedisClient("localhost", 6379))),
+    )
+    print(
+        f"{'payload':>9} {'pipeline':>9} {'process ms':>10} {'store ms':>8} "
+        f"{'read ms':>7} {'serve ms':>8} {'peak MB':>7}"
+    )
+    for name, response in payloads():
+        for pipeline, service in services:
+            process_ms, store_ms, read_ms, serve_ms = await run_stages(
+                service, response
+            )
+            peak = await peak_memory(service, response)
+            print(
+                f"{name:>9} {pipeline:>9} {process_ms:>10.1f} {store_ms:>8.1f} "
+                f"{read_ms:>7.1f} {serve_ms:>8.1f} {peak:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
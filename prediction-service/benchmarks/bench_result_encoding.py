@@ -0,0 +1,75 @@
+"""Compare the legacy base64/JSON result encoding with raw binary storage.
+
+Run from the prediction-service directory:
+
+    python -m benchmarks.bench_result_encoding
+"""
+import base64
+import json
+import os
+import time
+import tracemalloc
+
+CHUNK_SIZE = 64 * 1024
+SIZES_MB = (1, 4, 16)
+
+
+def legacy_store(chunks: list[bytes]) -> str:
+    full_body_bytes = b""
+    for data in chunks:
+        full_body_bytes += data
+    return json.dumps(
+        {
+            "type": "StreamingResponse",
+            "content": base64.b64encode(full_body_bytes).decode("utf-8"),
+            "content_type": "image/png",
+        }
+    )
+
+
+def legacy_load(stored: str) -> int:
+    result_data = json.loads(stored)
+    return len(base64.b64decode(result_data["content"]))
+
+
+def binary_store(chunks: list[bytes]) -> bytes:
+    return b"".join(chunks)
+
+
+def binary_load(stored: bytes) -> int:
+    view = memoryview(stored)
+    return sum(len(view[i : i + CHUNK_SIZE]) for i in range(0, len(view), CHUNK_SIZE))
+
+
+def measure(fn, arg):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(arg)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed * 1000, peak / 2**20
+
+
+def main():
+    print(
+        f"{'size':>6} {'encoding':>8} {'stored MB':>10} "
+        f"{'store ms':>9} {'store peak MB':>14} {'load ms':>8} {'load peak MB':>13}"
+    )
+    for size_mb in SIZES_MB:
+        payload = os.urandom(size_mb * 2**20)
+        chunks = [payload[i : i + CHUNK_SIZE] for i in range(0, len(payload), CHUNK_SIZE)]
+        for name, store, load in (
+            ("legacy", legacy_store, legacy_load),
+            ("binary", binary_store, binary_load),
+        ):
+            stored, store_ms, store_peak = measure(store, chunks)
+            _, load_ms, load_peak = measure(load, stored)
+            print(
+                f"{size_mb:>4}MB {name:>8} {len(stored) / 2**20:>10.2f} "
+                f"{store_ms:>9.1f} {store_peak:>14.1f} {load_ms:>8.1f} {load_peak:>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
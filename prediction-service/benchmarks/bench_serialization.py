@@ -0,0 +1,95 @@
+"""Compare the json, orjson and msgpack codecs on large detection result
+lists: encoded size, encode and decode time, and the time to read a stored
+result back into an API response body in each stored format.
+
+Needs orjson and msgpack (pip install orjson msgpack). Run from the
+prediction-service directory:
+
+    python -m benchmarks.bench_serialization
+"""
+import gc
+import json
+import time
+from loguru import logger
+from app.domain.prediction_service import PredictionService
+from app.infrastructure.serialization import JsonCodec, MsgpackCodec, OrjsonCodec
+from app.schemas.prediction import PredictionResponse
+
+DETECTIONS = (1_000, 10_000, 100_000)
+ROUNDS = 5
+MODEL = "densenet161"
+
+
+def detections(count: int) -> list[dict]:
+    return [
+        {
+            "label": f"class_{i % 1000}",
+            "score": 0.5 + (i % 500) / 1000,
+            "box": [i * 1.5, i * 2.5, i * 1.5 + 64.0, i * 2.5 + 48.0],
+        }
+        for i in range(count)
+    ]
+
+
+def timed(fn, *args) -> tuple[object, float]:
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            result = fn(*args)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return result, best * 1000
+
+
+def legacy_record(record: dict) -> bytes:
+    return json.dumps({"type": "PredictionResponse", "content": record}).encode()
+
+
+def serve(service: PredictionService, stored: bytes, metadata: dict) -> bytes:
+    result = service.build_result(stored, metadata)
+    if isinstance(result, PredictionResponse):
+        return result.model_dump_json().encode()
+    return result.body
+
+
+def main():
+    logger.remove()
+    service = PredictionService(None, None, None)
+    codecs = (JsonCodec(), OrjsonCodec(), MsgpackCodec())
+
+    print(
+        f"{'detections':>10} {'codec':>8} {'size KB':>8} "
+        f"{'encode ms':>9} {'decode ms':>9}"
+    )
+    for count in DETECTIONS:
+        record = {"prediction_model_name": MODEL, "results": detections(count)}
+        for codec in codecs:
+            encoded, encode_ms = timed(codec.dumps, record)
+            _, decode_ms = timed(codec.loads, encoded)
+            print(
+                f"{count:>10} {codec.name:>8} {len(encoded) / 1024:>8.0f} "
+                f"{encode_ms:>9.1f} {decode_ms:>9.1f}"
+            )
+
+    print()
+    print(f"{'detections':>10} {'stored format':>14} {'read and serve ms':>17}")
+    for count in DETECTIONS:
+        record = {"prediction_model_name": MODEL, "results": detections(count)}
+        for name, stored, metadata in (
+            ("legacy", legacy_record(record), {"type": "json"}),
+            ("json", OrjsonCodec().dumps(record), {"type": "json", "format": "json"}),
+            (
+                "msgpack",
+                MsgpackCodec().dumps(record),
+                {"type": "json", "format": "msgpack"},
+            ),
+        ):
+            _, serve_ms = timed(serve, service, stored, metadata)
+            print(f"{count:>10} {name:>14} {serve_ms:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
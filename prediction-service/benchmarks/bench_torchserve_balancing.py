@@ -0,0 +1,141 @@
+"""Route predictions across local fake TorchServe servers and compare plain
+round robin with least-outstanding balancing behind circuit breakers.
+
+Starts three fake servers on localhost: a fast one, a slow one and one that
+fails every call and health check. Needs nothing else running. Run from the
+prediction-service directory:
+
+    python -m benchmarks.bench_torchserve_balancing
+"""
+import asyncio
+import statistics
+import time
+from collections import Counter
+import uvicorn
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.infrastructure.adaptive_limiter import AdaptiveLimiter
+from app.infrastructure.torchserve_client import TorchServeClient
+from app.infrastructure.torchserve_pool import EndpointPool, TorchServeEndpoint
+
+REQUESTS = 600
+CONCURRENCY = 30
+MODEL = "densenet161"
+SERVERS = (
+    ("fast", 18081, 0.02, 200),
+    ("slow", 18082, 0.2, 200),
+    ("failing", 18083, 0.02, 500),
+)
+
+
+def fake_torchserve(latency: float, status_code: int) -> Starlette:
+    async def predict(request: Request):
+        await request.body()
+        await asyncio.sleep(latency)
+        return JSONResponse([{"label": "cat", "score": 0.9}], status_code=status_code)
+
+    async def ping(request: Request):
+        status = "Healthy" if status_code == 200 else "Unhealthy"
+        return JSONResponse({"status": status}, status_code=status_code)
+
+    return Starlette(
+        routes=[
+            Route("/predictions/{model}", predict, methods=["POST"]),
+            Route("/ping", ping),
+        ]
+    )
+
+
+class RoundRobinPool(EndpointPool):
+    def choose(self, model: str) -> TorchServeEndpoint:
+        return self.endpoints[next(self._rotation) % len(self.endpoints)]
+
+
+async def image():
+    yield b"\xff" * 1024
+
+
+async def run(pool: EndpointPool, hosts: dict[str, str]):
+    client = TorchServeClient(
+        hosts["fast"],
+        limiter=AdaptiveLimiter(CONCURRENCY, CONCURRENCY, CONCURRENCY, 0.9, 100.0, 30),
+    )
+    client.endpoints = pool
+    await client.start()
+    names = {host: name for name, host in hosts.items()}
+    routed, errors, latencies = Counter(), 0, []
+    remaining = iter(range(REQUESTS))
+    choose = pool.choose
+
+    def counting_choose(model: str) -> TorchServeEndpoint:
+        endpoint = choose(model)
+        routed[names[endpoint.host]] += 1
+        return endpoint
+
+    pool.choose = counting_choose
+
+    async def client_loop():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                await client.make_prediction(MODEL, image())
+                latencies.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    await client.close()
+
+    latencies.sort()
+    return (
+        REQUESTS / elapsed,
+        statistics.median(latencies),
+        latencies[int(len(latencies) * 0.99) - 1],
+        errors,
+        routed,
+    )
+
+
+async def main():
+    logger.remove()
+    servers = []
+    for _, port, latency, status_code in SERVERS:
+        server = uvicorn.Server(
+            uvicorn.Config(
+                fake_torchserve(latency, status_code),
+                host="127.0.0.1",
+                port=port,
+                log_level="error",
+            )
+        )
+        servers.append((server, asyncio.create_task(server.serve())))
+    while not all(server.started for server, _ in servers):
+        await asyncio.sleep(0.05)
+
+    hosts = {name: f"http://127.0.0.1:{port}" for name, port, _, _ in SERVERS}
+    pools = (
+        ("round robin", RoundRobinPool(list(hosts.values()), 10**9, 0, 3600)),
+        ("least outstanding", EndpointPool(list(hosts.values()), 5, 30.0, 0.5)),
+    )
+
+    print(f"{'routing':>18} {'req/s':>7} {'p50 ms':>7} {'p99 ms':>7} {'errors':>6}  calls")
+    for name, pool in pools:
+        throughput, p50, p99, errors, routed = await run(pool, hosts)
+        calls = ", ".join(f"{host}={routed[host]}" for host in hosts)
+        print(
+            f"{name:>18} {throughput:>7.0f} {p50:>7.1f} {p99:>7.1f} {errors:>6}  {calls}"
+        )
+
+    for server, task in servers:
+        server.should_exit = True
+        await task
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+"""Compare the HTTP/1.1, HTTP/2 and gRPC TorchServe transports against local
+stand-in servers: throughput, p50/p99 latency and the number of connections
+each transport opened to the server.
+
+Needs the optional transport dependencies and hypercorn for the stand-in
+REST server (pip install h2 grpcio "protobuf>=7.35.1" hypercorn). Run from the
+prediction-service directory:
+
+    python -m benchmarks.bench_torchserve_transports
+"""
+import asyncio
+import json
+import statistics
+import time
+import grpc
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from app.infrastructure.proto import inference_pb2
+from app.infrastructure.torchserve_transport import build_transport
+
+REQUESTS = 2000
+CONCURRENCY = 100
+LATENCY = 0.02
+MODEL = "densenet161"
+IMAGE = b"\xff" * 64 * 1024
+RESULT = json.dumps([{"label": "cat", "score": 0.9}] * 5).encode()
+TRANSPORTS = ("http1", "http2", "grpc")
+HTTP_PORT = 18090
+GRPC_PORT = 18091
+
+
+def rest_server(peers: set) -> Starlette:
+    async def predict(request: Request):
+        peers.add(tuple(request.scope["client"]))
+        await request.body()
+        await asyncio.sleep(LATENCY)
+        return Response(RESULT, media_type="application/json")
+
+    async def ping(request: Request):
+        return JSONResponse({"status": "Healthy"})
+
+    return Starlette(
+        routes=[
+            Route("/predictions/{model}", predict, methods=["POST"]),
+            Route("/ping", ping),
+        ]
+    )
+
+
+async def start_grpc_server(peers: set) -> grpc.aio.Server:
+    async def predictions(request, context):
+        peers.add(context.peer())
+        await asyncio.sleep(LATENCY)
+        return inference_pb2.PredictionResponse(prediction=RESULT)
+
+    handler = grpc.method_handlers_generic_handler(
+        "org.pytorch.serve.grpc.inference.InferenceAPIsService",
+        {
+            "Predictions": grpc.unary_unary_rpc_method_handler(
+                predictions,
+                request_deserializer=inference_pb2.PredictionsRequest.FromString,
+                response_serializer=inference_pb2.PredictionResponse.SerializeToString,
+            )
+        },
+    )
+    server = grpc.aio.server()
+    server.add_generic_rpc_handlers((handler,))
+    server.add_insecure_port(f"127.0.0.1:{GRPC_PORT}")
+    await server.start()
+    return server
+
+
+async def image():
+    for start in range(0, len(IMAGE), 16 * 1024):
+        yield IMAGE[start : start + 16 * 1024]
+
+
+async def run(name: str, host: str):
+    transport = build_transport(
+        name,
+        max_connections=CONCURRENCY,
+        max_keepalive_connections=CONCURRENCY,
+        keepalive_expiry=5.0,
+        connect_timeout=5.0,
+        timeout=30.0,
+        grpc_max_message_bytes=64 * 2**20,
+    )
+    latencies = []
+    remaining = iter(range(REQUESTS))
+
+    async def client_loop():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await transport.predict(host, MODEL, image())
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    await transport.close()
+
+    latencies.sort()
+    return (
+        REQUESTS / elapsed,
+        statistics.median(latencies),
+        latencies[int(len(latencies) * 0.99) - 1],
+    )
+
+
+async def main():
+    logger.remove()
+    rest_peers, grpc_peers = set(), set()
+    config = Config()
+    config.bind = [f"127.0.0.1:{HTTP_PORT}"]
+    config.loglevel = "ERROR"
+    config.keep_alive_max_requests = REQUESTS * len(TRANSPORTS)
+    shutdown = asyncio.Event()
+    rest_task = asyncio.create_task(
+        serve(rest_server(rest_peers), config, shutdown_trigger=shutdown.wait)
+    )
+    grpc_server = await start_grpc_server(grpc_peers)
+    await asyncio.sleep(0.5)
+
+    hosts = {
+        "http1": (f"http://127.0.0.1:{HTTP_PORT}", rest_peers),
+        "http2": (f"http://127.0.0.1:{HTTP_PORT}", rest_peers),
+        "grpc": (f"127.0.0.1:{GRPC_PORT}", grpc_peers),
+    }
+    print(f"{'transport':>9} {'req/s':>7} {'p50 ms':>7} {'p99 ms':>7} {'connections':>11}")
+    for name in TRANSPORTS:
+        host, peers = hosts[name]
+        peers.clear()
+        throughput, p50, p99 = await run(name, host)
+        print(f"{name:>9} {throughput:>7.0f} {p50:>7.1f} {p99:>7.1f} {len(peers):>11}")
+
+    await grpc_server.stop(None)
+    shutdown.set()
+    await rest_task
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
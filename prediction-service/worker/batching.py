@@ -0,0 +1,58 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable
+from loguru import logger
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        dispatch: Callable[[str, list[Any]], Awaitable[None]],
+        default_batch_size: int,
+        default_max_wait_ms: int,
+        batch_sizes: dict[str, int] | None = None,
+        max_waits_ms: dict[str, int] | None = None,
+    ):
+        self.dispatch = dispatch
+        self.default_batch_size = default_batch_size
+        self.default_max_wait_ms = default_max_wait_ms
+        self.batch_sizes = batch_sizes or {}
+        self.max_waits_ms = max_waits_ms or {}
+        self._buffers: dict[str, list[Any]] = defaultdict(list)
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def batch_size(self, model_name: str) -> int:
+        return self.batch_sizes.get(model_name, self.default_batch_size)
+
+    def max_wait(self, model_name: str) -> float:
+        return self.max_waits_ms.get(model_name, self.default_max_wait_ms) / 1000
+
+    def submit(self, model_name: str, item: Any):
+        buffer = self._buffers[model_name]
+        buffer.append(item)
+        if len(buffer) >= self.batch_size(model_name):
+            self.flush(model_name)
+        elif model_name not in self._timers:
+            self._timers[model_name] = asyncio.get_running_loop().call_later(
+                self.max_wait(model_name), self.flush, model_name
+            )
+
+    def flush(self, model_name: str):
+        timer = self._timers.pop(model_name, None)
+        if timer:
+            timer.cancel()
+        batch = self._buffers.pop(model_name, None)
+        if not batch:
+            return
+
+        logger.info(f"Dispatching batch of {len(batch)} for model {model_name}")
+        task = asyncio.create_task(self.dispatch(model_name, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self):
+        for model_name in list(self._buffers):
+            self.flush(model_name)
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -1,53 +1,343 @@
 import json
 import asyncio
+import signal
+import time
+from prometheus_client import start_http_server
 from loguru import logger
-from app.api.dependencies import (
-    get_message_queue,
-    get_prediction_service,
-    get_redis_client,
-    get_torchserve_client,
+from app.core.config import settings
+from app.core.log_events import Payload, log_event
+from app.core.logger_config import setup_logging
+from app.core.metrics import WORKER_DROPPED, WORKER_FAILURES, WORKER_IN_FLIGHT
+from app.domain.prediction_service import PredictionService
+from app.infrastructure.client_registry import ClientRegistry
+from app.infrastructure.serialization import DecodeError
+from app.schemas.prediction import PredictionRequest, QueuedPredictionRequest
+from .batching import MicroBatcher
+
+clients = ClientRegistry()
+mq = clients.mq
+cancellations = clients.cancellation_notifier
+prediction_service = PredictionService(
+    clients.mq,
+    clients.torchserve_client,
+    clients.redis_client,
+    blob_store=clients.blob_store,
+    admission_controller=clients.admission_controller,
 )
-from app.schemas.prediction import PredictionRequest
 
-mq = get_message_queue()
-redis_client = get_redis_client()
-torchserve_client = get_torchserve_client()
-prediction_service = get_prediction_service(mq, torchserve_client, redis_client)
 
+def queue_weights() -> dict[str, int]:
+    if settings.WORKER_MODELS:
+        queue_names = {mq.queue_for(model) for model in settings.WORKER_MODELS}
+    else:
+        queue_names = set(mq.queue_names)
+    weights = dict.fromkeys(queue_names, settings.WORKER_SHARED_QUEUE_WEIGHT)
+    for model, queue_name in mq.model_queues.items():
+        if queue_name in weights:
+            weights[queue_name] = settings.WORKER_QUEUE_WEIGHTS.get(model, 1)
+    return weights
+
+
+def start_timeline(message) -> dict:
+    timeline = {"dequeued_at": time.time()}
+    if "published_at" in message.headers:
+        timeline["published_at"] = message.headers["published_at"]
+    return timeline
+
+
+class PredictionDropped(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def time_remaining(message) -> float | None:
+    deadline = message.headers.get("deadline")
+    if deadline is None:
+        return None
+    return max(float(deadline) - time.time(), 0.0)
+
+
+async def ensure_wanted(message, inference_id: str):
+    if time_remaining(message) == 0:
+        raise PredictionDropped("expired")
+    if await prediction_service.is_cancelled(inference_id):
+        raise PredictionDropped("cancelled")
+
+
+async def predict_until_dropped(
+    message,
+    inference_id: str,
+    prediction_request: PredictionRequest,
+    timeline: dict | None,
+):
+    with cancellations.waiter(inference_id) as cancelled:
+        prediction = asyncio.ensure_future(
+            prediction_service.make_prediction(prediction_request, timeline)
+        )
+        try:
+            done, _ = await asyncio.wait(
+                {prediction, cancelled},
+                timeout=time_remaining(message),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            if not prediction.done():
+                prediction.cancel()
+                await asyncio.gather(prediction, return_exceptions=True)
+    if prediction in done:
+        return prediction.result()
+    raise PredictionDropped("cancelled" if cancelled in done else "expired")
 
-async def process_message(message):
-    body = message.body.decode()
-    inference_id = message.headers.get("inference_id")
 
-    logger.info(f"Received message for inference ID: {inference_id}. Message: {body}")
+async def drop_prediction(
+    inference_id: str, prediction_request: PredictionRequest, reason: str
+):
+    logger.warning(f"Dropping inference_id {inference_id}, it is {reason}.")
+    WORKER_DROPPED.labels(reason).inc()
+    if reason == "expired":
+        try:
+            await prediction_service.finish_without_result(
+                inference_id,
+                prediction_request.prediction_model_name,
+                "expired",
+                "Deadline exceeded.",
+            )
+        except Exception as e:
+            logger.error(f"Failed to mark inference_id {inference_id} expired: {e}")
+    await prediction_service.release_request(prediction_request)
+
+
+def error_result(prediction_request: PredictionRequest) -> str:
+    return json.dumps(
+        {
+            "prediction_model_name": prediction_request.prediction_model_name,
+            "results": "Error while making the prediction.",
+        }
+    )
 
+
+async def handle_failure(message, error: Exception) -> bool:
+    """Schedule a delayed retry for a transient failure, or dead-letter it.
+
+    Returns True when the message was sent for a retry, in which case its
+    result must not be stored yet.
+    """
+    detail = getattr(error, "detail", None) or str(error)
+    retryable = (
+        getattr(error, "status_code", None) in settings.WORKER_RETRY_STATUS_CODES
+    )
     try:
-        data = json.loads(body)
-        prediction_request = PredictionRequest(**data)
-        logger.info(f"Processing request: {prediction_request}")
+        if retryable and await mq.retry(message, detail):
+            WORKER_FAILURES.labels("retried").inc()
+            return True
+        await mq.dead_letter(message, detail)
+        WORKER_FAILURES.labels("dead_lettered").inc()
+    except Exception as e:
+        logger.error(
+            f"Failed to retry or dead-letter inference_id "
+            f"{message.headers.get('inference_id')}: {e}"
+        )
+    return False
+
+
+async def run_prediction(
+    message, prediction_request: PredictionRequest, timeline: dict | None = None
+):
+    inference_id = message.headers.get("inference_id")
+    try:
+        await ensure_wanted(message, inference_id)
+        return await predict_until_dropped(
+            message, inference_id, prediction_request, timeline
+        )
+    except PredictionDropped as e:
+        await drop_prediction(inference_id, prediction_request, e.reason)
+        return None
+    except Exception as e:
+        if await handle_failure(message, e):
+            return None
+        return error_result(prediction_request)
+
+
+async def process_message(message):
+    with WORKER_IN_FLIGHT.track_inprogress():
+        timeline = start_timeline(message)
+        inference_id = message.headers.get("inference_id")
+
+        log_event(
+            "worker.message",
+            "Received message for inference ID: {}. Message: {}",
+            inference_id,
+            Payload(message.body),
+        )
 
         try:
-            result = await prediction_service.make_prediction(prediction_request)
-        except Exception:
-            result = json.dumps(
-                {
-                    "prediction_model_name": prediction_request.prediction_model_name,
-                    "results": "Error while making the prediction.",
-                }
-            )
-        await prediction_service.store_response(inference_id, result)
-
-        logger.info(f"Processed message for inference ID: {inference_id}")
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decode error: {e}")
+            data = mq.decode(message)
+            prediction_request = QueuedPredictionRequest(**data)
+            log_event(
+                "worker.message", "Processing request: {}", Payload(prediction_request)
+            )
+
+            result = await run_prediction(message, prediction_request, timeline)
+            if result is None:
+                return
+            try:
+                await prediction_service.store_response(
+                    inference_id,
+                    result,
+                    prediction_request.prediction_model_name,
+                    timeline,
+                )
+            except Exception as e:
+                logger.error(
+                    f"Failed to store the result for inference_id {inference_id}, "
+                    f"requeueing it: {e}"
+                )
+                await message.reject(requeue=True)
+                return
+            await prediction_service.release_request(prediction_request)
+
+            log_event(
+                "worker.message", "Processed message for inference ID: {}", inference_id
+            )
+        except DecodeError as e:
+            logger.error(f"Message decode error: {e}")
+        except Exception as e:
+            logger.error(f"Failed to process message: {e}")
+
+
+async def process_batch(model_name: str, batch: list[tuple]):
+    logger.info(f"Processing batch of {len(batch)} messages for model {model_name}")
+    try:
+        results = await asyncio.gather(
+            *(
+                run_prediction(message, prediction_request, timeline)
+                for message, _, prediction_request, timeline in batch
+            )
+        )
+        completed = [
+            (item, result) for item, result in zip(batch, results) if result is not None
+        ]
     except Exception as e:
-        logger.error(f"Failed to process message: {e}")
+        logger.error(f"Failed to process batch for model {model_name}: {e}")
+        for message, _, _, _ in batch:
+            await message.reject()
+        return
+
+    if completed:
+        try:
+            await prediction_service.store_responses(
+                [(item[1], result) for item, result in completed],
+                model_name,
+                [item[3] for item, _ in completed],
+            )
+        except Exception as e:
+            # Messages without a result were already retried, dead-lettered or
+            # dropped; only the ones whose results were lost go back.
+            logger.error(f"Failed to store batch results for model {model_name}: {e}")
+            for (message, _, _, _), result in zip(batch, results):
+                if result is not None:
+                    await message.reject(requeue=True)
+                else:
+                    await message.ack()
+            return
+
+    for item, _ in completed:
+        await prediction_service.release_request(item[2])
+    for message, _, _, _ in batch:
+        await message.ack()
+    logger.info(f"Processed batch of {len(batch)} messages for model {model_name}")
+
+
+async def process_batch_tracked(model_name: str, batch: list[tuple]):
+    try:
+        await process_batch(model_name, batch)
+    finally:
+        WORKER_IN_FLIGHT.dec(len(batch))
+
+
+async def consume_in_batches(queues: dict, stop_event: asyncio.Event):
+    batcher = MicroBatcher(
+        process_batch_tracked,
+        default_batch_size=settings.WORKER_BATCH_SIZE,
+        default_max_wait_ms=settings.WORKER_BATCH_MAX_WAIT_MS,
+        batch_sizes=settings.WORKER_MODEL_BATCH_SIZES,
+        max_waits_ms=settings.WORKER_MODEL_BATCH_MAX_WAIT_MS,
+    )
+
+    async def on_message(message):
+        if stop_event.is_set():
+            await message.reject(requeue=True)
+            return
+        timeline = start_timeline(message)
+        inference_id = message.headers.get("inference_id")
+        try:
+            prediction_request = QueuedPredictionRequest(**mq.decode(message))
+        except Exception as e:
+            logger.error(f"Failed to parse message {inference_id}: {e}")
+            await message.reject()
+            return
+        WORKER_IN_FLIGHT.inc()
+        batcher.submit(
+            prediction_request.prediction_model_name,
+            (message, inference_id, prediction_request, timeline),
+        )
+
+    logger.info(f"Starting consuming {list(queues)} in micro-batches...")
+    consumer_tags = {
+        queue_name: await queue.consume(on_message)
+        for queue_name, queue in queues.items()
+    }
+    await stop_event.wait()
+
+    logger.info("Stopping consumer, flushing pending batches.")
+    for queue_name, consumer_tag in consumer_tags.items():
+        await queues[queue_name].cancel(consumer_tag)
+    await batcher.close()
+
+
+async def refresh_queue_depth(stop_event: asyncio.Event):
+    while not stop_event.is_set():
+        await mq.refresh_queue_depth()
+        try:
+            await asyncio.wait_for(
+                stop_event.wait(), timeout=settings.QUEUE_DEPTH_REFRESH_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
 
 
 async def main():
+    setup_logging()
+    start_http_server(settings.WORKER_METRICS_PORT)
     await asyncio.sleep(10)
-    await mq.connect()
-    await mq.consume(process_message)
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    try:
+        await clients.start()
+        await cancellations.start()
+        weights = queue_weights()
+        queues = await mq.connect_queues(
+            sorted(weights), settings.WORKER_PREFETCH_COUNT
+        )
+        queue_depth_task = asyncio.create_task(refresh_queue_depth(stop_event))
+        if settings.WORKER_BATCHING_ENABLED:
+            await consume_in_batches(queues, stop_event)
+        else:
+            await mq.consume_concurrently(
+                process_message,
+                stop_event,
+                max_in_flight=settings.WORKER_MAX_IN_FLIGHT,
+                queues=queues,
+                weights=weights,
+            )
+        await queue_depth_task
+    finally:
+        await clients.close()
+        await logger.complete()
 
 
 if __name__ == "__main__":